@@ -0,0 +1,159 @@
+# ann_index.py
+# Inverted-file (IVF) approximate nearest-neighbour index for JobSearchEngine.
+#
+# Jobs are grouped into n_lists clusters by spherical k-means; a query is only scored
+# against the jobs in its nprobe closest clusters. nprobe is the recall/latency knob:
+# nprobe == n_lists scans everything and returns exactly the brute-force results.
+#
+# Built offline next to the vector store:
+#   python ann_index.py job_vectors_store [--lists 1024] [--nprobe 32]
+import argparse
+import os
+
+import numpy as np
+
+from search_engine import normalize_rows, top_n_indices
+
+INDEX_FILE = "ivf_index.npz"
+ASSIGN_CHUNK_ROWS = 65536
+
+
+def default_n_lists(n_rows):
+    return max(1, min(n_rows, int(4 * np.sqrt(n_rows))))
+
+
+# Closest centroid (by dot product) for every row, computed in blocks. scales turns
+# int8 rows of a compressed store back into their (projected) float values.
+def assign_to_centroids(matrix, centroids, scales=None):
+    assignments = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], ASSIGN_CHUNK_ROWS):
+        block = np.asarray(matrix[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        if scales is not None:
+            block *= scales
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+# Spherical k-means on unit vectors; returns unit-length centroids
+def train_centroids(sample, n_lists, n_iter=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = assign_to_centroids(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=n_lists)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    def __init__(self, centroids, order, offsets, nprobe=16, digest=""):
+        self.centroids = centroids
+        # Row numbers grouped by list: list i owns order[offsets[i]:offsets[i + 1]]
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+        # vector_store.store_digest of the store it was built over (ids and vectors)
+        self.digest = digest
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    # scales are the int8 steps of a compressed store (see compression.py): rows are
+    # clustered dequantized, and the centroids are then divided by the scales so they
+    # can be probed with the engine's query, which has the scales folded in
+    @classmethod
+    def build(cls, matrix, n_lists=None, nprobe=16, n_iter=20, sample_size=100_000, seed=0, digest="",
+              scales=None):
+        n_rows = matrix.shape[0]
+        n_lists = min(n_lists or default_n_lists(n_rows), n_rows)
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(n_rows, min(n_rows, max(sample_size, n_lists)), replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+        if scales is not None:
+            sample = normalize_rows(sample * scales)
+
+        centroids = train_centroids(sample, n_lists, n_iter=n_iter, seed=seed)
+        assignments = assign_to_centroids(matrix, centroids, scales)
+        if scales is not None:
+            centroids = (centroids / scales).astype(np.float32)
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+        return cls(centroids, order, offsets, nprobe=nprobe, digest=digest)
+
+    # Rows of the matrix that a query probing `nprobe` lists has to score
+    def candidate_rows(self, query, nprobe=None):
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        probed = top_n_indices(self.centroids @ query, nprobe)
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in probed])
+
+    # query must already be unit length; returns (rows, scores), best first.
+    # Rows where mask is False are dropped before scoring.
+    def search(self, matrix, query, top_n=50, nprobe=None, mask=None):
+        rows = np.sort(self.candidate_rows(query, nprobe))
+        if mask is not None:
+            rows = rows[mask[rows]]
+        scores = np.asarray(matrix[rows], dtype=np.float32) @ query
+        best = top_n_indices(scores, top_n)
+        return rows[best], scores[best]
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                 nprobe=np.int64(self.nprobe), digest=np.array(self.digest))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            # Indexes saved before the vectors digest have none and are never attached
+            digest = str(data["digest"]) if "digest" in data.files else ""
+            return cls(data["centroids"], data["order"], data["offsets"], nprobe=int(data["nprobe"]), digest=digest)
+
+
+# Attach the index saved in store_dir to the engine, unless it was built for other
+# vectors (jobs re-embedded under the same ids change the digest too)
+def attach_saved_index(engine, store_dir):
+    from vector_store import store_digest
+
+    path = os.path.join(store_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return False
+    index = IVFIndex.load(path)
+    if not index.digest or index.digest != store_digest(store_dir):
+        return False
+    engine.index = index
+    return True
+
+
+def main():
+    from compression import load_compression
+    from vector_store import load_vectors, store_digest
+
+    parser = argparse.ArgumentParser(description="Build the IVF index for a vector store")
+    parser.add_argument("store_dir", nargs="?", default="job_vectors_store")
+    parser.add_argument("--lists", type=int, default=None, help="number of k-means lists (default 4*sqrt(N))")
+    parser.add_argument("--nprobe", type=int, default=16, help="default number of lists probed per query")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sample-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    job_ids, matrix = load_vectors(args.store_dir)
+    compression = load_compression(args.store_dir)
+    scales = compression.scales if compression is not None else None
+    index = IVFIndex.build(matrix, n_lists=args.lists, nprobe=args.nprobe, n_iter=args.iterations,
+                           sample_size=args.sample_size, digest=store_digest(args.store_dir), scales=scales)
+    index.save(os.path.join(args.store_dir, INDEX_FILE))
+    print(f"Built IVF index with {index.n_lists} lists over {len(job_ids)} jobs (nprobe={index.nprobe})")
+
+
+if __name__ == "__main__":
+    main()
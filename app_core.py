@@ -0,0 +1,151 @@
+# app_core.py
+# Shared search, embedding and LLM resources for every page.
+#
+# Importing this module has no side effects: no page config, no secrets, no data
+# loading and no Together import. Each resource is created on first use with
+# st.cache_resource and then shared by every page and session of the server process.
+import streamlit as st
+from data_loader import load_search_engine
+from search_engine import JobSearchEngine
+from embedding_cache import QueryEmbeddingCache, QUERY_CACHE_DB
+from explanation_cache import ExplanationCache, EXPLANATION_CACHE_DB
+from embedding_providers import get_embedding_provider
+from explanations import ExplanationGenerator, FALLBACK_MODEL, PRIMARY_MODEL
+from query_filters import QueryFilter
+from reranker import reranker_from_settings
+from saved_searches import SavedSearchStore, SAVED_SEARCHES_DB
+from tracing import current_trace, tracer
+
+# Function to configure a page; every page script calls it first, since pages no longer
+# import streamlit_app (which would re-run the home page)
+def configure_page():
+    st.set_page_config(
+        page_title="Job Portal",
+        page_icon="💼",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    # Per-stage latency tracing and the sidebar debug panel ([debug] tracing = true)
+    tracer.enabled = bool(st.secrets.get("debug", {}).get("tracing", False))
+
+# Function to get the API Key for Together AI (secrets are read on first use, not on import)
+def get_together_api_key():
+    return st.secrets["together"]["TOGETHER_API_KEY"]
+
+# Function to get the query embedding backend settings:
+# backend "together" (remote API) or "local" (in-process sentence-transformers),
+# quantize None, "int8" or "onnx" for the local backend
+def get_embedding_settings():
+    settings = st.secrets.get("embedding", {})
+    return settings.get("backend", "together"), settings.get("quantize")
+
+# Function to get a Together client, created once per API key and reused across reruns
+@st.cache_resource
+def get_together_client(api_key):
+    from together import Together
+
+    return Together(api_key=api_key)
+
+# Function to get the concurrent/streamed explanation pipeline (shared, bounded thread pool)
+@st.cache_resource
+def get_explanation_generator(api_key):
+    return ExplanationGenerator(get_together_client(api_key), PRIMARY_MODEL, FALLBACK_MODEL, cache=get_explanation_cache())
+
+# Function to get the explanation cache shared by every session
+@st.cache_resource
+def get_explanation_cache():
+    return ExplanationCache(db_path=EXPLANATION_CACHE_DB)
+
+# Function to get the query embedding cache shared by every session
+@st.cache_resource
+def get_embedding_cache():
+    return QueryEmbeddingCache(db_path=QUERY_CACHE_DB)
+
+# Function to get the configured embedding backend, loaded once per server process
+@st.cache_resource
+def get_query_embedding_provider(api_key):
+    backend, quantize = get_embedding_settings()
+    if backend == "together":
+        return get_embedding_provider("together", client=get_together_client(api_key))
+    return get_embedding_provider(backend, quantize=quantize)
+
+# Function to get query embedding
+def get_query_embedding(query, api_key):
+    provider = get_query_embedding_provider(api_key)
+    with tracer.span("embedding"):
+        return get_embedding_cache().get_or_compute(query, provider.name, provider.embed_query)
+
+# Function to get the optional cross-encoder re-ranker, or None when it is disabled
+# ([rerank] enabled = true in secrets.toml); the model is loaded once per process
+@st.cache_resource
+def get_reranker():
+    return reranker_from_settings(st.secrets.get("rerank", {}))
+
+# Function to re-rank the best results; keeps the original order if disabled, over budget or failing
+def rerank_results(user_query, results):
+    reranker = get_reranker()
+    if reranker is None:
+        return results
+    try:
+        with tracer.span("rerank"):
+            results, _ = reranker.rerank(user_query, results)
+    except Exception as e:
+        st.warning(f"Re-ranking failed, showing results by similarity: {e}")
+    return results
+
+# Function to get the rule-based query filter over the loaded jobs, built once per process
+@st.cache_resource
+def get_query_filter():
+    engine = load_search_engine()
+    return QueryFilter(engine.jobs if engine else [])
+
+# Function to get the saved searches (alerts for new postings), shared by every session
+@st.cache_resource
+def get_saved_searches():
+    return SavedSearchStore(SAVED_SEARCHES_DB)
+
+# Function to save a query for alerts; the embedding comes from the cache filled by the search
+def save_search(query, threshold):
+    provider = get_query_embedding_provider(get_together_api_key())
+    embedding = get_query_embedding(query, get_together_api_key())
+    return get_saved_searches().add(query, embedding, provider.name, threshold=threshold)
+
+# Function to calculate most relevant job offers
+# query_text adds BM25 keyword matching to the ranking when the engine has a BM25 index
+def get_top_similar_jobs(query_embedding, job_vectors, top_n=50, nprobe=None, mask=None, query_text=None):
+    # job_vectors can be the raw job_vectors.pkl dict or a prebuilt JobSearchEngine
+    if isinstance(job_vectors, JobSearchEngine):
+        engine = job_vectors
+    else:
+        engine = JobSearchEngine.from_job_vectors(job_vectors)
+    for job_id in engine.skipped_ids:
+        st.warning(f"Incorrect embedding for job_id {job_id}")
+    with tracer.span("search"):
+        return engine.search(query_embedding, top_n=top_n, nprobe=nprobe, mask=mask, query_text=query_text)
+
+# Function to show the tracing debug panel in the sidebar (only when tracing is on).
+# The "Profile next search" checkbox is read by the page through st.session_state.
+def render_debug_panel():
+    if not tracer.enabled:
+        return
+    with st.sidebar.expander("Debug: latency", expanded=False):
+        trace = current_trace()
+        if trace is not None and trace.spans:
+            st.write(f"This run: {trace.total() * 1000:.1f} ms")
+            st.table([
+                {"stage": "  " * depth + name, "ms": round(seconds * 1000, 1), "error": failed}
+                for name, seconds, depth, failed in trace.spans
+            ])
+        stats = tracer.stage_stats()
+        if stats:
+            st.write("All requests (rolling window)")
+            st.table([
+                {"stage": name, "count": row["count"], "p50 ms": round(row["p50"] * 1000, 1),
+                 "p95 ms": round(row["p95"] * 1000, 1), "p99 ms": round(row["p99"] * 1000, 1)}
+                for name, row in stats.items()
+            ])
+            st.download_button("Prometheus metrics", tracer.prometheus_text(), file_name="metrics.prom",
+                               mime="text/plain")
+        if trace is not None and trace.profile:
+            st.text(trace.profile)
+        st.checkbox("Profile next search", key="debug_profile_next")
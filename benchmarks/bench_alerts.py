@@ -0,0 +1,55 @@
+# bench_alerts.py
+# Saved-search alerts: one batched (searches x new jobs) product, as in saved_searches.py,
+# against re-running every saved search as a full AI Search scan.
+#
+#   python benchmarks/bench_alerts.py --jobs 200000 --new-jobs 2000 --searches 100 1000 5000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eval_ann import clustered_matrix
+from saved_searches import match_rows
+from search_engine import JobSearchEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched saved-search matching")
+    parser.add_argument("--jobs", type=int, default=100_000, help="jobs in the store")
+    parser.add_argument("--new-jobs", type=int, default=2_000, help="jobs added since the last run")
+    parser.add_argument("--searches", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--rescan-cap", type=int, default=200,
+                        help="full scans actually timed; the rest is extrapolated")
+    args = parser.parse_args()
+
+    matrix = clustered_matrix(args.jobs, args.dim)
+    engine = JobSearchEngine([str(row) for row in range(args.jobs)], matrix, [{}] * args.jobs, normalized=True)
+    new_rows = np.arange(args.jobs - args.new_jobs, args.jobs)
+    rng = np.random.default_rng(1)
+    print(f"{args.jobs} jobs x {args.dim} dims, {args.new_jobs} new")
+    print(f"{'searches':>9} {'batched s':>10} {'rescan s':>10} {'speedup':>8} {'alerts':>7}")
+    for n_searches in args.searches:
+        queries = matrix[rng.integers(0, args.jobs, n_searches)] + 0.05 * rng.standard_normal(
+            (n_searches, args.dim), dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        thresholds = np.full(n_searches, args.threshold, dtype=np.float32)
+
+        start = time.perf_counter()
+        matches = match_rows(queries, thresholds, matrix, new_rows)
+        batched = time.perf_counter() - start
+
+        timed = min(n_searches, args.rescan_cap)
+        start = time.perf_counter()
+        for query in queries[:timed]:
+            engine.search(query, top_n=50)
+        rescan = (time.perf_counter() - start) * n_searches / timed
+        print(f"{n_searches:>9} {batched:>10.3f} {rescan:>10.3f} {rescan / batched:>7.0f}x {len(matches):>7}")
+
+
+if __name__ == "__main__":
+    main()
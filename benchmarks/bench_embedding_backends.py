@@ -0,0 +1,57 @@
+# bench_embedding_backends.py
+# Query-path latency of the embedding backends (no query cache involved).
+#
+#   python benchmarks/bench_embedding_backends.py --backends together local local:int8 local:onnx
+#
+# The together backend reads TOGETHER_API_KEY from the environment.
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from embedding_providers import get_embedding_provider
+from tracing import percentile
+
+SAMPLE_QUERIES = [
+    "AI engineer with Python",
+    "Senior data analyst, remote, SQL and Tableau",
+    "Junior frontend developer React TypeScript",
+    "DevOps engineer Kubernetes Terraform AWS",
+    "Machine learning researcher PyTorch computer vision",
+    "Backend developer Go microservices Kafka",
+    "Data engineer Spark Airflow not freelance",
+    "Mobile developer Flutter in Europe",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query embedding backends")
+    parser.add_argument("--backends", nargs="+", default=["together", "local"],
+                        help="together, local, or local:<int8|onnx>")
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the sample queries")
+    args = parser.parse_args()
+
+    print(f"{'backend':>12} {'first call (s)':>15} {'p50 (ms)':>9} {'p95 (ms)':>9} {'mean (ms)':>10}")
+    for backend in args.backends:
+        name, _, quantize = backend.partition(":")
+        provider = get_embedding_provider(name, api_key=os.environ.get("TOGETHER_API_KEY"),
+                                          quantize=quantize or None)
+        # The first call includes model loading / connection setup
+        start = time.perf_counter()
+        provider.embed_query(SAMPLE_QUERIES[0])
+        first_call = time.perf_counter() - start
+
+        timings = []
+        for _ in range(args.rounds):
+            for query in SAMPLE_QUERIES:
+                start = time.perf_counter()
+                provider.embed_query(query)
+                timings.append(1000 * (time.perf_counter() - start))
+        print(f"{backend:>12} {first_call:>15.2f} {percentile(timings, 50):>9.1f} "
+              f"{percentile(timings, 95):>9.1f} {statistics.mean(timings):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
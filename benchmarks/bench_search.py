@@ -0,0 +1,95 @@
+# bench_search.py
+# Compares the old per-job cosine_similarity loop with JobSearchEngine on synthetic jobs.
+#
+#   python benchmarks/bench_search.py --sizes 10000 100000 1000000
+#
+# The legacy loop needs a dict of Python float lists, which does not fit in memory
+# at 1M jobs, so it is timed on at most --legacy-cap jobs and extrapolated linearly.
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_engine import JobSearchEngine, normalize_rows
+
+
+# Copy of the original get_top_similar_jobs loop, without the Streamlit warnings
+def legacy_top_similar_jobs(query_embedding, job_vectors, top_n=50):
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    similarities = []
+    for job_id, job_data in job_vectors.items():
+        job_embedding = np.array(job_data["embedding"])
+        if job_embedding.shape != (1024,):
+            continue
+        job_embedding = job_embedding.reshape(1, -1)
+        query_embedding_array = np.array(query_embedding).reshape(1, -1)
+        similarity = cosine_similarity(query_embedding_array, job_embedding)[0][0]
+        similarities.append((job_id, similarity, job_data["data"]))
+    similarities.sort(key=lambda x: x[1], reverse=True)
+    return similarities[:top_n]
+
+
+def synthetic_matrix(n_jobs, dim, seed=0, chunk=100_000):
+    rng = np.random.default_rng(seed)
+    matrix = np.empty((n_jobs, dim), dtype=np.float32)
+    for start in range(0, n_jobs, chunk):
+        stop = min(start + chunk, n_jobs)
+        matrix[start:stop] = rng.standard_normal((stop - start, dim), dtype=np.float32)
+    return matrix
+
+
+def synthetic_jobs(n_jobs):
+    return [{"id": f"job-{i}", "title": f"Job {i}"} for i in range(n_jobs)]
+
+
+def time_call(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized job search engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--legacy-cap", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(args.dim).astype(np.float32)
+
+    print(f"{'jobs':>10} {'legacy (s)':>12} {'engine (s)':>12} {'speedup':>9}")
+    for n_jobs in args.sizes:
+        matrix = synthetic_matrix(n_jobs, args.dim)
+        jobs = synthetic_jobs(n_jobs)
+        job_ids = [job["id"] for job in jobs]
+
+        legacy_n = min(n_jobs, args.legacy_cap)
+        legacy_vectors = {
+            job_ids[i]: {"embedding": matrix[i].tolist(), "data": jobs[i]} for i in range(legacy_n)
+        }
+        legacy_time = time_call(lambda: legacy_top_similar_jobs(query, legacy_vectors, args.top_n), 1)
+        legacy_time *= n_jobs / legacy_n
+        del legacy_vectors
+
+        engine = JobSearchEngine(job_ids, normalize_rows(matrix), jobs, normalized=True)
+        engine_time = time_call(lambda: engine.search(query, args.top_n), args.repeats)
+
+        estimated = "*" if legacy_n < n_jobs else " "
+        print(f"{n_jobs:>10} {legacy_time:>11.3f}{estimated} {engine_time:>12.4f} {legacy_time / engine_time:>8.0f}x")
+        del engine, matrix
+
+    print("* extrapolated from --legacy-cap jobs")
+
+
+if __name__ == "__main__":
+    main()
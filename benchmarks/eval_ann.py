@@ -0,0 +1,85 @@
+# eval_ann.py
+# Recall@K and latency of the IVF index against brute force, for several nprobe values.
+#
+#   python benchmarks/eval_ann.py --store job_vectors_store --nprobe 1 4 8 16 32 64
+#   python benchmarks/eval_ann.py --synthetic 200000      # clustered random vectors
+#
+# Queries are stored job vectors with a little noise added, which is close to how
+# real queries land in the bge embedding space.
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ann_index import INDEX_FILE, IVFIndex
+from search_engine import JobSearchEngine, normalize_rows, top_n_indices
+
+
+def clustered_matrix(n_jobs, dim, n_clusters=500, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, n_clusters, n_jobs)
+    matrix = centers[labels] + 0.5 * rng.standard_normal((n_jobs, dim), dtype=np.float32)
+    return normalize_rows(matrix)
+
+
+def make_queries(matrix, n_queries, noise, seed=1):
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(matrix.shape[0], n_queries, replace=False)
+    queries = np.asarray(matrix[rows], dtype=np.float32)
+    queries = queries + noise * rng.standard_normal(queries.shape, dtype=np.float32) / np.sqrt(matrix.shape[1])
+    return normalize_rows(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate IVF recall against brute-force search")
+    parser.add_argument("--store", default=None, help="vector store directory (uses its saved index if present)")
+    parser.add_argument("--synthetic", type=int, default=100_000, help="number of synthetic jobs when no store is given")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.store:
+        from vector_store import load_vectors
+
+        job_ids, matrix = load_vectors(args.store)
+        index_path = os.path.join(args.store, INDEX_FILE)
+        index = IVFIndex.load(index_path) if os.path.exists(index_path) and not args.lists else None
+    else:
+        matrix = clustered_matrix(args.synthetic, args.dim)
+        job_ids = list(range(matrix.shape[0]))
+        index = None
+    if index is None:
+        start = time.perf_counter()
+        index = IVFIndex.build(matrix, n_lists=args.lists)
+        print(f"Built {index.n_lists} lists in {time.perf_counter() - start:.1f}s")
+
+    engine = JobSearchEngine(job_ids, matrix, [None] * len(job_ids), normalized=True)
+    queries = make_queries(matrix, args.queries, args.noise)
+
+    start = time.perf_counter()
+    exact = [set(top_n_indices(engine.score(q), args.top_n).tolist()) for q in queries]
+    brute_ms = 1000 * (time.perf_counter() - start) / len(queries)
+    print(f"{len(job_ids)} jobs, {len(queries)} queries, brute force {brute_ms:.2f} ms/query")
+
+    print(f"{'nprobe':>7} {'recall@' + str(args.top_n):>10} {'ms/query':>9} {'speedup':>8}")
+    for nprobe in args.nprobe:
+        hits = 0
+        start = time.perf_counter()
+        for q, truth in zip(queries, exact):
+            rows, _ = index.search(matrix, q, args.top_n, nprobe)
+            hits += len(truth.intersection(rows.tolist()))
+        ann_ms = 1000 * (time.perf_counter() - start) / len(queries)
+        recall = hits / (len(queries) * args.top_n)
+        print(f"{nprobe:>7} {recall:>10.4f} {ann_ms:>9.2f} {brute_ms / ann_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# eval_compression.py
+# recall@10/@50, size and scan time of compressed vectors against the full-precision
+# store, for several target dimensions with and without int8 quantization.
+#
+#   python benchmarks/eval_compression.py --store job_vectors_store --dims 128 256 384 0
+#   python benchmarks/eval_compression.py --synthetic 100000
+#
+# dim 0 keeps every dimension (int8 only). Nothing is written; build the chosen
+# configuration with compression.py or generate_embeddings.py --compress-output.
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from compression import VectorCompression, compress_matrix, recall_report, sample_queries
+from eval_ann import clustered_matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate PCA/truncation and int8 compression of job vectors")
+    parser.add_argument("--store", default=None, help="full-precision vector store directory")
+    parser.add_argument("--synthetic", type=int, default=50_000, help="number of synthetic jobs when no store is given")
+    parser.add_argument("--dim", type=int, default=1024, help="dimension of the synthetic vectors")
+    parser.add_argument("--dims", type=int, nargs="+", default=[128, 256, 384, 0])
+    parser.add_argument("--method", choices=["pca", "truncate"], default="pca")
+    parser.add_argument("--sample-size", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.store:
+        from vector_store import load_vectors
+
+        _, matrix = load_vectors(args.store)
+    else:
+        matrix = clustered_matrix(args.synthetic, args.dim)
+    rng = np.random.default_rng(0)
+    sample = np.asarray(matrix[np.sort(rng.choice(matrix.shape[0], min(args.sample_size, matrix.shape[0]),
+                                                  replace=False))], dtype=np.float32)
+    queries = sample_queries(matrix, args.queries, args.noise)
+    print(f"{matrix.shape[0]} jobs x {matrix.shape[1]} dims ({matrix.dtype}), {len(queries)} queries")
+
+    print(f"{'dim':>5} {'int8':>5} {'recall@10':>10} {'recall@50':>10} {'MB':>8} {'smaller':>8} {'ms/query':>9}")
+    for dim in args.dims:
+        for int8 in (False, True):
+            if not dim and not int8:
+                continue
+            compression = VectorCompression.fit(sample, dim=dim or None, method=args.method, int8=int8)
+            report = recall_report(matrix, compress_matrix(matrix, compression), compression, queries)
+            print(f"{compression.output_dim:>5} {'yes' if int8 else 'no':>5} {report['recall@10']:>10.4f} "
+                  f"{report['recall@50']:>10.4f} {report['compressed_mb']:>8.1f} "
+                  f"{report['full_mb'] / report['compressed_mb']:>7.1f}x {report['compressed_ms']:>9.2f}")
+    print(f"full precision: {report['full_mb']:.1f} MB, {report['full_ms']:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# eval_rerank.py
+# Ranking quality and latency of the cross-encoder re-ranking stage for several top-K.
+#
+#   python benchmarks/eval_rerank.py queries.jsonl --store job_vectors_store --k 10 20 50
+#
+# queries.jsonl has one {"query": "...", "relevant": ["job_id", ...]} per line. With
+# relevance labels it reports MRR@10 and nDCG@10 of the search order and of each
+# re-ranked order; without them ("relevant" missing) it reports how much of the top 10
+# each K shares with the largest K. Latency is the uncached cross-encoder time per query.
+# The together backend reads TOGETHER_API_KEY from the environment.
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ann_index import attach_saved_index
+from bm25_index import attach_bm25
+from embedding_providers import get_embedding_provider
+from reranker import CrossEncoderReranker, RERANK_MODEL
+from tracing import percentile
+from vector_store import load_vector_store
+
+TOP = 10
+
+
+def mrr(ranked_ids, relevant):
+    for rank, job_id in enumerate(ranked_ids[:TOP], start=1):
+        if job_id in relevant:
+            return 1 / rank
+    return 0.0
+
+
+def ndcg(ranked_ids, relevant):
+    dcg = sum(1 / math.log2(rank + 1) for rank, job_id in enumerate(ranked_ids[:TOP], start=1) if job_id in relevant)
+    ideal = sum(1 / math.log2(rank + 1) for rank in range(1, min(len(relevant), TOP) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate cross-encoder re-ranking")
+    parser.add_argument("queries", help="JSON Lines file with query and optional relevant job ids")
+    parser.add_argument("--store", default="job_vectors_store")
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 20, 30, 50], help="candidates re-ranked")
+    parser.add_argument("--model", default=RERANK_MODEL)
+    parser.add_argument("--backend", default="local", help="query embedding backend: together or local")
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    labeled = all("relevant" in item for item in queries)
+
+    engine = load_vector_store(args.store)
+    attach_saved_index(engine, args.store)
+    attach_bm25(engine, args.store, save=False)
+    provider = get_embedding_provider(args.backend, api_key=os.environ.get("TOGETHER_API_KEY"))
+    # No cache and no budget: every K is scored in full and timed
+    reranker = CrossEncoderReranker(model=args.model, batch_size=args.batch_size)
+    start = time.perf_counter()
+    reranker.warm()
+    print(f"Loaded and warmed {args.model} in {time.perf_counter() - start:.1f}s; {len(queries)} queries, {len(engine)} jobs")
+
+    max_k = max(args.k)
+    baseline = []
+    reranked = {k: [] for k in args.k}
+    latencies = {k: [] for k in args.k}
+    for item in queries:
+        results = engine.search(provider.embed_query(item["query"]), top_n=max_k, query_text=item["query"])
+        baseline.append([job_id for job_id, _, _ in results])
+        for k in args.k:
+            head = [(job_id, job) for job_id, _, job in results[:k]]
+            start = time.perf_counter()
+            scores = reranker.score(item["query"], head)
+            latencies[k].append(1000 * (time.perf_counter() - start))
+            order = np.argsort(-scores, kind="stable")
+            reranked[k].append([head[i][0] for i in order] + baseline[-1][k:])
+
+    if labeled:
+        relevant = [{str(job_id) for job_id in item["relevant"]} for item in queries]
+        print(f"{'order':>10} {'MRR@10':>8} {'nDCG@10':>8} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+        print(f"{'search':>10} {np.mean([mrr(r, rel) for r, rel in zip(baseline, relevant)]):>8.4f} "
+              f"{np.mean([ndcg(r, rel) for r, rel in zip(baseline, relevant)]):>8.4f} {'-':>9} {'-':>9}")
+        for k in args.k:
+            print(f"{'K=' + str(k):>10} {np.mean([mrr(r, rel) for r, rel in zip(reranked[k], relevant)]):>8.4f} "
+                  f"{np.mean([ndcg(r, rel) for r, rel in zip(reranked[k], relevant)]):>8.4f} "
+                  f"{percentile(latencies[k], 50):>9.1f} {percentile(latencies[k], 95):>9.1f}")
+    else:
+        print(f"No relevance labels: top-{TOP} overlap with the K={max_k} re-ranked order")
+        print(f"{'order':>10} {'overlap@10':>11} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+        reference = [set(order[:TOP]) for order in reranked[max_k]]
+        overlap = [len(ref.intersection(order[:TOP])) / TOP for ref, order in zip(reference, baseline)]
+        print(f"{'search':>10} {np.mean(overlap):>11.3f} {'-':>9} {'-':>9}")
+        for k in args.k:
+            overlap = [len(ref.intersection(order[:TOP])) / TOP for ref, order in zip(reference, reranked[k])]
+            print(f"{'K=' + str(k):>10} {np.mean(overlap):>11.3f} "
+                  f"{percentile(latencies[k], 50):>9.1f} {percentile(latencies[k], 95):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# load_test.py
+# Closed-loop load generator for search_api.py: QPS and p50/p95/p99 latency.
+#
+#   python search_api.py --stub --synthetic 100000 &
+#   python benchmarks/load_test.py --url http://127.0.0.1:8080 --concurrency 32 --requests 2000
+#
+#   python benchmarks/load_test.py --in-process --synthetic 50000     # no HTTP, no server
+#
+# Each of --concurrency workers sends its next request as soon as the previous one
+# returns. Queries are drawn (with a fixed seed) from --distinct query variants, so a
+# smaller pool means more identical queries in flight and more coalescing.
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracing import percentile
+
+BASE_QUERIES = [
+    "AI engineer with Python",
+    "Senior data analyst, remote, SQL and Tableau",
+    "Junior frontend developer React TypeScript",
+    "DevOps engineer Kubernetes Terraform AWS",
+    "Machine learning researcher PyTorch computer vision",
+    "Backend developer Go microservices Kafka",
+    "Data engineer Spark Airflow not freelance",
+    "Mobile developer Flutter in Europe",
+]
+
+
+def make_queries(distinct, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for i in range(distinct):
+        base = BASE_QUERIES[i % len(BASE_QUERIES)]
+        queries.append(base if i < len(BASE_QUERIES) else f"{base} {rng.choice(['senior', 'junior', 'lead', 'mid'])} {i}")
+    return queries
+
+
+async def run_load(send, queries, n_requests, concurrency, seed=0):
+    rng = random.Random(seed)
+    plan = [rng.choice(queries) for _ in range(n_requests)]
+    latencies = []
+    errors = []
+    position = 0
+
+    async def worker():
+        nonlocal position
+        while position < len(plan):
+            query = plan[position]
+            position += 1
+            start = time.perf_counter()
+            try:
+                await send(query)
+            except Exception as e:
+                errors.append(e)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def main_async(args):
+    queries = make_queries(args.distinct)
+    if args.in_process:
+        from search_api import build_service
+
+        service = build_service(stub=True, synthetic=args.synthetic, max_workers=args.workers,
+                                stub_embedding_delay=args.stub_embedding_delay, stub_llm_delay=args.stub_llm_delay)
+        call = service.search if args.endpoint == "search" else service.explain
+
+        async def send(query):
+            await call(query, args.top_n)
+
+        latencies, errors, elapsed = await run_load(send, queries, args.requests, args.concurrency)
+        stats = service.stats
+        service.close()
+    else:
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            url = f"{args.url.rstrip('/')}/{args.endpoint}"
+
+            async def send(query):
+                async with session.get(url, params={"q": query, "top_n": args.top_n}) as response:
+                    response.raise_for_status()
+                    await response.read()
+
+            latencies, errors, elapsed = await run_load(send, queries, args.requests, args.concurrency)
+            async with session.get(f"{args.url.rstrip('/')}/stats") as response:
+                stats = await response.json()
+
+    print(f"{args.endpoint}: {len(latencies)} ok, {len(errors)} errors in {elapsed:.2f}s "
+          f"({args.concurrency} concurrent, {args.distinct} distinct queries)")
+    if errors:
+        print(f"  first error: {errors[0]!r}")
+    if latencies:
+        ms = [1000 * latency for latency in latencies]
+        print(f"  {len(latencies) / elapsed:.1f} QPS")
+        print(f"  p50 {percentile(ms, 50):.1f} ms, p95 {percentile(ms, 95):.1f} ms, "
+              f"p99 {percentile(ms, 99):.1f} ms, mean {statistics.mean(ms):.1f} ms")
+    print(f"  server: {stats.get('computed')} computed, {stats.get('coalesced')} coalesced")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the search API")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--endpoint", choices=["search", "explain"], default="search")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=50, help="number of different queries")
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--in-process", action="store_true",
+                        help="call the service directly with stub backends instead of over HTTP")
+    parser.add_argument("--synthetic", type=int, default=50_000, help="jobs for --in-process")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="search threads for --in-process")
+    parser.add_argument("--stub-embedding-delay", type=float, default=0.0)
+    parser.add_argument("--stub-llm-delay", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
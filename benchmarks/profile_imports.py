@@ -0,0 +1,61 @@
+# profile_imports.py
+# Import-time profile of the app modules, each in a fresh interpreter (python -X importtime).
+#
+#   python benchmarks/profile_imports.py
+#   python benchmarks/profile_imports.py --modules app_core together sklearn --top 15
+#
+# Pages import app_core instead of streamlit_app, so a page load should only pay for
+# app_core; compare it with the heavy packages it no longer imports eagerly.
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# [(package, self_us, cumulative_us, depth)] for one "import module" in a new process
+def profile_import(module):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, package = match.groups()
+            entries.append((package, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the app modules")
+    parser.add_argument("--modules", nargs="+",
+                        default=["streamlit", "app_core", "data_loader", "together", "sklearn"])
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports listed per module")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            entries = profile_import(module)
+        except RuntimeError as e:
+            print(f"{module}: not importable ({e})\n")
+            continue
+        # Children are listed before their parent, so the module's imports are the
+        # block between the previous top-level line (interpreter startup) and its own line
+        end = max(i for i, entry in enumerate(entries) if entry[0] == module and entry[3] == 0)
+        start = max((i for i in range(end) if entries[i][3] == 0), default=-1) + 1
+        total = entries[end][2]
+        print(f"{module}: {total / 1000:.1f} ms, {end - start + 1} modules imported")
+        direct = [(package, cumulative) for package, _, cumulative, depth in entries[start:end] if depth == 1]
+        for package, cumulative in sorted(direct, key=lambda item: -item[1])[:args.top]:
+            print(f"  {package:<30} {cumulative / 1000:>8.1f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
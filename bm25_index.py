@@ -0,0 +1,140 @@
+# bm25_index.py
+# Sparse BM25 index over the same Title/Description/Skills text that
+# generate_embeddings.py embeds. JobSearchEngine fuses its scores with the cosine
+# scores, so jobs that literally contain a term of the query ("Kafka", "Terraform")
+# are not out-ranked by jobs that are only semantically close.
+#
+# The document side of BM25 (idf * saturated, length-normalized term frequency) is
+# precomputed into a CSC jobs x terms matrix, so scoring a query is the sum of the
+# few sparse columns of its terms.
+#
+#   python bm25_index.py job_vectors_store     # prebuild bm25.npz next to the store
+import argparse
+import os
+from array import array
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from generate_embeddings import build_job_text
+from job_index import tokenize
+from vector_store import store_digest
+
+BM25_FILE = "bm25.npz"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+# Key of the saved index: the store's digest (its ids and vectors, which change whenever
+# a job's title, description or skills do) plus the source of the job records when they
+# come from a job store instead of the store's metadata. Both are read without touching
+# the jobs, so a cold start does not rebuild every job's text just to validate bm25.npz.
+def index_key(store_dir, jobs_source=""):
+    return f"{store_digest(store_dir)}:{jobs_source}"
+
+
+class BM25Index:
+    def __init__(self, weights, vocabulary, digest=""):
+        self.weights = weights.tocsc()
+        # token -> column of weights
+        self.vocabulary = vocabulary
+        # index_key of the store and jobs it was built from
+        self.digest = digest
+
+    def __len__(self):
+        return self.weights.shape[0]
+
+    @classmethod
+    def build(cls, texts, k1=BM25_K1, b=BM25_B, digest=""):
+        vocabulary = {}
+        rows = array("i")
+        cols = array("i")
+        counts = array("f")
+        lengths = array("f")
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(token, len(vocabulary)))
+                counts.append(count)
+        rows = np.frombuffer(rows, dtype=np.int32)
+        cols = np.frombuffer(cols, dtype=np.int32)
+        tf = np.frombuffer(counts, dtype=np.float32)
+        lengths = np.frombuffer(lengths, dtype=np.float32)
+
+        n_docs = len(lengths)
+        avg_length = float(lengths.mean()) if n_docs and lengths.any() else 1.0
+        df = np.bincount(cols, minlength=len(vocabulary))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        length_norm = k1 * (1 - b + b * lengths[rows] / avg_length)
+        data = idf[cols] * tf * (k1 + 1) / (tf + length_norm)
+        weights = sparse.csc_matrix((data, (rows, cols)), shape=(n_docs, len(vocabulary)), dtype=np.float32)
+        return cls(weights, vocabulary, digest=digest)
+
+    @classmethod
+    def from_jobs(cls, jobs, **kwargs):
+        return cls.build([build_job_text(job) for job in jobs], **kwargs)
+
+    # BM25 score of every job for the query, in row order, or None if no query term is indexed
+    def score(self, query_text):
+        cols = sorted({self.vocabulary[token] for token in tokenize(query_text) if token in self.vocabulary})
+        if not cols:
+            return None
+        return np.asarray(self.weights[:, cols].sum(axis=1), dtype=np.float32).ravel()
+
+    def save(self, path):
+        tokens = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(path, data=self.weights.data, indices=self.weights.indices, indptr=self.weights.indptr,
+                 shape=np.array(self.weights.shape), tokens=np.array(tokens, dtype=str),
+                 digest=np.array(self.digest))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            weights = sparse.csc_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+            vocabulary = {token: col for col, token in enumerate(data["tokens"].tolist())}
+            # Indexes saved before the key was recorded have none and are rebuilt
+            digest = str(data["digest"]) if "digest" in data.files else ""
+            return cls(weights, vocabulary, digest=digest)
+
+
+# Attach the saved BM25 index when it was built from the same store and job records
+# (jobs_source: JobStore.source, or "" for the store's own metadata), otherwise build it
+# from the engine's jobs (and save it for the next start when save=True)
+def attach_bm25(engine, store_dir, jobs_source="", save=True):
+    path = os.path.join(store_dir, BM25_FILE)
+    key = index_key(store_dir, jobs_source)
+    if os.path.exists(path):
+        index = BM25Index.load(path)
+        if index.digest == key:
+            engine.lexical = index
+            return index
+    index = BM25Index.from_jobs(engine.jobs, digest=key)
+    if save:
+        try:
+            index.save(path)
+        except OSError:
+            pass
+    engine.lexical = index
+    return index
+
+
+def main():
+    from vector_store import load_vector_store
+
+    parser = argparse.ArgumentParser(description="Build the BM25 index for a vector store")
+    parser.add_argument("store_dir", nargs="?", default="job_vectors_store")
+    parser.add_argument("--k1", type=float, default=BM25_K1)
+    parser.add_argument("-b", type=float, default=BM25_B)
+    args = parser.parse_args()
+
+    engine = load_vector_store(args.store_dir)
+    index = BM25Index.from_jobs(engine.jobs, k1=args.k1, b=args.b, digest=index_key(args.store_dir))
+    index.save(os.path.join(args.store_dir, BM25_FILE))
+    print(f"Built BM25 index with {len(index.vocabulary)} terms over {len(index)} jobs")
+
+
+if __name__ == "__main__":
+    main()
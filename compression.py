@@ -0,0 +1,223 @@
+# compression.py
+# Smaller vector stores: fewer dimensions (PCA or plain truncation) and/or int8 scalar
+# quantization, checked against the full-precision store before anything is written.
+#
+#   python compression.py job_vectors_store job_vectors_store_compressed --dim 256 --int8
+#
+# The compressed directory is a regular vector store plus compression.npz with the
+# projection and the int8 scales. Queries go through the same projection and the scales
+# are folded into the query, so scoring is still one matrix-vector product over the
+# stored rows (int8 rows are upcast block by block, like float16).
+#
+# When the full store has an IVF index (ivf_index.npz), the copy gets its own, built over
+# the compressed rows with the same number of lists. The BM25 index (bm25.npz) depends on
+# the job data the app loads, so it is built in the copy on the app's first start.
+#
+# The projection has no centering and rows are not re-normalized afterwards: the dot
+# product of two projected vectors then approximates their original cosine similarity.
+import argparse
+import os
+import time
+
+import numpy as np
+
+from ann_index import INDEX_FILE, IVFIndex
+from search_engine import SCORE_CHUNK_ROWS, JobSearchEngine, normalize_rows, top_n_indices
+from vector_store import METADATA_FILE, VectorStoreWriter, _read_json, load_vectors, store_digest, store_exists
+
+COMPRESSION_FILE = "compression.npz"
+RECALL_KS = (10, 50)
+
+
+class VectorCompression:
+    def __init__(self, input_dim, components=None, scales=None, method="none", source_digest=""):
+        self.input_dim = input_dim
+        # (input_dim, output_dim) projection; None keeps every dimension
+        self.components = components
+        # Per-dimension int8 step; None stores float32
+        self.scales = scales
+        self.method = method
+        # store_digest of the full store it was built from (ids and vectors)
+        self.source_digest = source_digest
+
+    @property
+    def output_dim(self):
+        return self.input_dim if self.components is None else self.components.shape[1]
+
+    @property
+    def dtype(self):
+        return np.dtype(np.int8 if self.scales is not None else np.float32)
+
+    # method "pca" keeps the top principal directions of the sample; "truncate" keeps the
+    # first dim coordinates (only sensible for Matryoshka-trained models)
+    @classmethod
+    def fit(cls, sample, dim=None, method="pca", int8=False):
+        sample = np.asarray(sample, dtype=np.float32)
+        input_dim = sample.shape[1]
+        components = None
+        if dim and dim < input_dim:
+            if method == "pca":
+                # Eigenvectors of the uncentered second moment, largest first
+                eigenvalues, eigenvectors = np.linalg.eigh(sample.T @ sample / len(sample))
+                components = np.ascontiguousarray(eigenvectors[:, ::-1][:, :dim], dtype=np.float32)
+            elif method == "truncate":
+                components = np.eye(input_dim, dim, dtype=np.float32)
+            else:
+                raise ValueError(f"Unknown reduction method: {method}")
+        else:
+            method = "none"
+        compression = cls(input_dim, components=components, method=method)
+        if int8:
+            projected = compression.project(sample)
+            compression.scales = np.maximum(np.abs(projected).max(axis=0), 1e-6).astype(np.float32) / 127
+        return compression
+
+    def project(self, block):
+        block = np.asarray(block, dtype=np.float32)
+        if self.components is None:
+            return block
+        if self.method == "truncate":
+            return np.ascontiguousarray(block[:, :self.output_dim])
+        return block @ self.components
+
+    # Stored representation of L2-normalized rows
+    def compress(self, block):
+        projected = self.project(block)
+        if self.scales is None:
+            return projected
+        return np.clip(np.rint(projected / self.scales), -127, 127).astype(np.int8)
+
+    # Unit-length query -> vector to multiply the stored rows with
+    def transform_query(self, query):
+        projected = self.project(query.reshape(1, -1))[0]
+        return projected * self.scales if self.scales is not None else projected
+
+    def save(self, path):
+        np.savez(path, input_dim=self.input_dim, method=self.method, source_digest=self.source_digest,
+                 components=self.components if self.components is not None else np.empty(0, np.float32),
+                 scales=self.scales if self.scales is not None else np.empty(0, np.float32))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            components = data["components"] if data["components"].size else None
+            scales = data["scales"] if data["scales"].size else None
+            return cls(int(data["input_dim"]), components=components, scales=scales, method=str(data["method"]),
+                       source_digest=str(data["source_digest"]))
+
+
+def load_compression(store_dir):
+    path = os.path.join(store_dir, COMPRESSION_FILE)
+    return VectorCompression.load(path) if os.path.exists(path) else None
+
+
+# True if compressed_dir holds a compressed copy of the current contents of store_dir
+def is_compressed_copy(compressed_dir, store_dir):
+    if not (store_exists(compressed_dir) and store_exists(store_dir)):
+        return False
+    compression = load_compression(compressed_dir)
+    return compression is not None and compression.source_digest == store_digest(store_dir)
+
+
+def compress_matrix(matrix, compression):
+    compressed = np.empty((matrix.shape[0], compression.output_dim), dtype=compression.dtype)
+    for start in range(0, matrix.shape[0], SCORE_CHUNK_ROWS):
+        compressed[start:start + SCORE_CHUNK_ROWS] = compression.compress(matrix[start:start + SCORE_CHUNK_ROWS])
+    return compressed
+
+
+# Stored job vectors with noise added, as in benchmarks/eval_ann.py
+def sample_queries(matrix, n_queries=200, noise=1.0, seed=1):
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(matrix.shape[0], min(n_queries, matrix.shape[0]), replace=False)
+    queries = np.asarray(matrix[np.sort(rows)], dtype=np.float32)
+    queries = queries + noise * rng.standard_normal(queries.shape, dtype=np.float32) / np.sqrt(matrix.shape[1])
+    return normalize_rows(queries)
+
+
+# recall@k of the compressed matrix against exact full-precision search, plus size and speed
+def recall_report(matrix, compressed, compression, queries, ks=RECALL_KS):
+    n_rows = matrix.shape[0]
+    full = JobSearchEngine(range(n_rows), matrix, [None] * n_rows, normalized=True)
+    small = JobSearchEngine(range(n_rows), compressed, [None] * n_rows, normalized=True)
+    small.compression = compression
+    max_k = max(ks)
+    hits = {k: 0 for k in ks}
+    full_seconds = small_seconds = 0.0
+    for query in queries:
+        start = time.perf_counter()
+        truth = top_n_indices(full.score(query), max_k)
+        full_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        found = top_n_indices(small.score(query), max_k)
+        small_seconds += time.perf_counter() - start
+        for k in ks:
+            hits[k] += len(np.intersect1d(truth[:k], found[:k]))
+    report = {f"recall@{k}": hits[k] / (len(queries) * min(k, n_rows)) for k in ks}
+    report.update({
+        "full_mb": matrix.nbytes / 2**20,
+        "compressed_mb": compressed.nbytes / 2**20,
+        "full_ms": 1000 * full_seconds / len(queries),
+        "compressed_ms": 1000 * small_seconds / len(queries),
+    })
+    return report
+
+
+def format_report(report):
+    recalls = ", ".join(f"{key} {value:.4f}" for key, value in report.items() if key.startswith("recall@"))
+    return (f"{recalls}; {report['full_mb']:.1f} MB -> {report['compressed_mb']:.1f} MB "
+            f"({report['full_mb'] / report['compressed_mb']:.1f}x smaller); "
+            f"{report['full_ms']:.2f} -> {report['compressed_ms']:.2f} ms/query")
+
+
+# Build a compressed copy of a full-precision store, with an IVF index when the full
+# store has one. Nothing is written when recall@10 falls below min_recall; raises
+# ValueError in that case.
+def compress_store(store_dir, output_dir, dim=None, method="pca", int8=False, sample_size=50_000,
+                   n_queries=200, min_recall=None, seed=0):
+    job_ids, matrix = load_vectors(store_dir)
+    rng = np.random.default_rng(seed)
+    sample_rows = np.sort(rng.choice(matrix.shape[0], min(sample_size, matrix.shape[0]), replace=False))
+    compression = VectorCompression.fit(matrix[sample_rows], dim=dim, method=method, int8=int8)
+    compression.source_digest = store_digest(store_dir)
+    compressed = compress_matrix(matrix, compression)
+
+    report = recall_report(matrix, compressed, compression, sample_queries(matrix, n_queries))
+    if min_recall is not None and report["recall@10"] < min_recall:
+        raise ValueError(f"recall@10 {report['recall@10']:.4f} is below {min_recall}; "
+                         f"{output_dir} was not written")
+
+    writer = VectorStoreWriter(output_dir, compressed.shape[0], compressed.shape[1], dtype=compressed.dtype)
+    writer.write(0, compressed)
+    compression.save(os.path.join(output_dir, COMPRESSION_FILE))
+    writer.close(job_ids, _read_json(os.path.join(store_dir, METADATA_FILE)))
+
+    # The saved index is tied to the rows it was built over, so it is not copied
+    index_path = os.path.join(store_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        source_index = IVFIndex.load(index_path)
+        index = IVFIndex.build(compressed, n_lists=source_index.n_lists, nprobe=source_index.nprobe, seed=seed,
+                               digest=store_digest(output_dir), scales=compression.scales)
+        index.save(os.path.join(output_dir, INDEX_FILE))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a reduced and/or int8 copy of a vector store")
+    parser.add_argument("store_dir", help="full-precision vector store")
+    parser.add_argument("output_dir")
+    parser.add_argument("--dim", type=int, default=None, help="dimensions kept (default: all)")
+    parser.add_argument("--method", choices=["pca", "truncate"], default="pca")
+    parser.add_argument("--int8", action="store_true", help="int8 scalar quantization")
+    parser.add_argument("--sample-size", type=int, default=50_000, help="rows used to fit PCA and scales")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--min-recall", type=float, default=None, help="refuse to write below this recall@10")
+    args = parser.parse_args()
+
+    report = compress_store(args.store_dir, args.output_dir, dim=args.dim, method=args.method, int8=args.int8,
+                            sample_size=args.sample_size, n_queries=args.queries, min_recall=args.min_recall)
+    print(f"Wrote {args.output_dir}: {format_report(report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,78 +11,83 @@ experience_levels = [f"{i} years of experience" for i in range(1, 21)]  # 1 a 20
 experience_conditions = ["less than", "more than", "at least", "under", "over"]
 
 # Generar reglas
-rules = []
+def generate_rules():
+    rules = []
 
-# Reglas para tipos de empleo
-for negation in negation_patterns:
-    for job_type in job_types:
-        rules.append({
-            "pattern": f"{negation} {job_type.lower()}",
-            "field": "type",
-            "condition": "not_contains",
-            "value": job_type
-        })
-
-# Reglas para habilidades
-for negation in negation_patterns:
-    for skill in skills:
-        rules.append({
-            "pattern": f"{negation} {skill.lower()}",
-            "field": "skills",
-            "condition": "not_contains",
-            "value": skill
-        })
-
-# Reglas para ubicaciones
-for negation in negation_patterns:
-    for location in locations:
-        rules.append({
-            "pattern": f"{negation} in {location.lower()}",
-            "field": "location",
-            "condition": "not_contains",
-            "value": location
-        })
-
-# Reglas para seniorities
-for negation in negation_patterns:
-    for seniority in seniorities:
-        rules.append({
-            "pattern": f"{negation} {seniority.lower()}",
-            "field": "title",
-            "condition": "not_contains",
-            "value": seniority
-        })
-
-# Reglas para experiencia
-for condition in experience_conditions:
-    for years in range(1, 21):
-        rules.append({
-            "pattern": f"{condition} {years} years of experience",
-            "field": "description",
-            "condition": condition.replace(" ", "_"),
-            "value": str(years)
-        })
+    # Reglas para tipos de empleo
+    for negation in negation_patterns:
+        for job_type in job_types:
+            rules.append({
+                "pattern": f"{negation} {job_type.lower()}",
+                "field": "type",
+                "condition": "not_contains",
+                "value": job_type
+            })
 
-# Combinaciones adicionales (por ejemplo, "not remote python developer")
-for negation in negation_patterns:
-    for skill in skills[:20]:  # Limitar para no exceder demasiado
-        for location in locations[:20]:
+    # Reglas para habilidades
+    for negation in negation_patterns:
+        for skill in skills:
             rules.append({
-                "pattern": f"{negation} {location.lower()} {skill.lower()}",
+                "pattern": f"{negation} {skill.lower()}",
                 "field": "skills",
                 "condition": "not_contains",
                 "value": skill
             })
+
+    # Reglas para ubicaciones
+    for negation in negation_patterns:
+        for location in locations:
             rules.append({
-                "pattern": f"{negation} {location.lower()} {skill.lower()}",
+                "pattern": f"{negation} in {location.lower()}",
                 "field": "location",
                 "condition": "not_contains",
                 "value": location
             })
 
+    # Reglas para seniorities
+    for negation in negation_patterns:
+        for seniority in seniorities:
+            rules.append({
+                "pattern": f"{negation} {seniority.lower()}",
+                "field": "title",
+                "condition": "not_contains",
+                "value": seniority
+            })
+
+    # Reglas para experiencia
+    for condition in experience_conditions:
+        for years in range(1, 21):
+            rules.append({
+                "pattern": f"{condition} {years} years of experience",
+                "field": "description",
+                "condition": condition.replace(" ", "_"),
+                "value": str(years)
+            })
+
+    # Combinaciones adicionales (por ejemplo, "not remote python developer")
+    for negation in negation_patterns:
+        for skill in skills[:20]:  # Limitar para no exceder demasiado
+            for location in locations[:20]:
+                rules.append({
+                    "pattern": f"{negation} {location.lower()} {skill.lower()}",
+                    "field": "skills",
+                    "condition": "not_contains",
+                    "value": skill
+                })
+                rules.append({
+                    "pattern": f"{negation} {location.lower()} {skill.lower()}",
+                    "field": "location",
+                    "condition": "not_contains",
+                    "value": location
+                })
+
+    return rules
+
 # Guardar las reglas en un archivo
-rules_dict = {"rules": rules}
-with open("filter_rules.json", "w", encoding="utf-8") as f:
-    json.dump(rules_dict, f, indent=2)
+if __name__ == "__main__":
+    rules = generate_rules()
+    rules_dict = {"rules": rules}
+    with open("filter_rules.json", "w", encoding="utf-8") as f:
+        json.dump(rules_dict, f, indent=2)
 
-print(f"Se generaron {len(rules)} reglas y se guardaron en filter_rules.json")
\ No newline at end of file
+    print(f"Se generaron {len(rules)} reglas y se guardaron en filter_rules.json")
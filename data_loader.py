@@ -1,54 +1,114 @@
 # data_loader.py
+import warnings
+
 import streamlit as st
-import gdown
-import json
-import pickle
+from job_index import JobIndex
+from job_store import JobStore, load_job_store as load_job_store_file
+from dataset_sync import DatasetSync, make_source
+from dedup import deduplicated_path
+from tracing import tracer
+from vector_store import convert_pickle, converted_from, open_search_engine, store_exists
 
 # Google Drive file IDs
 JOINED_DATA_FILE_ID = "1oyd9zrfHkZ7iNMZs6uh2GVm5e6bJMfeo"
 JOB_VECTORS_FILE_ID = "1cwEI79DQyIARuqKm1lH9M2y11NDLbd-L"
 
-# Function to download file from Google Drive
-@st.cache_data
-def download_from_drive(file_id, output_path):
-    try:
-        url = f"https://drive.google.com/uc?id={file_id}"
-        gdown.download(url, output_path, quiet=False)
-        return output_path
-    except Exception as e:
-        st.error(f"Error downloading file from Google Drive: {e}")
-        return None
+JOINED_DATA_FILE = "joined_data_standar.json"
+JOB_VECTORS_FILE = "job_vectors.pkl"
+DRIVE_FILE_IDS = {JOINED_DATA_FILE: JOINED_DATA_FILE_ID, JOB_VECTORS_FILE: JOB_VECTORS_FILE_ID}
 
-# Function to load data from JSON file
-@st.cache_data
-def load_data():
+# Memory-mapped vector store built from job_vectors.pkl (see vector_store.py)
+VECTOR_STORE_DIR = "job_vectors_store"
+# Reduced/int8 copy written by compression.py; used instead when it matches the store
+COMPRESSED_STORE_DIR = "job_vectors_store_compressed"
+
+# Function to bring the data files up to date, once per server process.
+# Unchanged files are not downloaded again; changed ones are fetched concurrently.
+@st.cache_resource
+def sync_datasets():
+    # Dataset sync settings (see dataset_sync.py): source is "drive", a directory or an
+    # http(s) URL; bump version to force a fresh download from Drive. Without a
+    # drive_api_key, Drive copies are downloaded again after max_age_hours.
+    settings = st.secrets.get("dataset", {})
+    sync = DatasetSync(
+        make_source(settings.get("source", "drive"), DRIVE_FILE_IDS, drive_api_key=settings.get("drive_api_key")),
+        data_dir=settings.get("data_dir", "."),
+        version=settings.get("version", "1"),
+        max_age=settings.get("max_age_hours", 24) * 3600,
+    )
+    with tracer.span("data.sync"):
+        artifacts = sync.sync([JOINED_DATA_FILE, JOB_VECTORS_FILE])
+    for name, artifact in artifacts.items():
+        if "error" not in artifact:
+            continue
+        if artifact["path"]:
+            st.warning(f"Could not refresh {name}, using the local copy: {artifact['error']}")
+        else:
+            st.error(f"Error downloading {name}: {artifact['error']}")
+    return artifacts
+
+# Function to get the local path of a synced data file, or None
+def get_data_path(name):
+    return sync_datasets().get(name, {}).get("path")
+
+# Function to load the job store, streamed and validated once and shared by every page.
+# Uses the deduplicated copy (generate_embeddings.py --dedup) when it is up to date.
+@st.cache_resource
+def load_job_store():
     try:
-        # Download the JSON file from Google Drive
-        json_path = "joined_data_standar.json"
-        downloaded_path = download_from_drive(JOINED_DATA_FILE_ID, json_path)
-        if downloaded_path:
-            with open(downloaded_path, "r", encoding="utf-8") as file:
-                data = json.load(file)
-            return data
+        artifact = sync_datasets().get(JOINED_DATA_FILE, {})
+        json_path = artifact.get("path")
+        if json_path:
+            load_path = deduplicated_path(json_path)
+            # The synced file's sha256 identifies it for the BM25 index; the deduplicated
+            # copy is identified by its size and modification time
+            source = artifact.get("sha256") if load_path == json_path else None
+            with tracer.span("data.load_jobs"):
+                job_store = load_job_store_file(load_path, source=source)
+            if job_store.invalid:
+                st.warning(f"Skipped {job_store.invalid} invalid or duplicate job records")
+            return job_store
         else:
-            return []
+            return JobStore([])
     except Exception as e:
         st.error(f"Error loading JSON file: {e}")
-        return []
+        return JobStore([])
+
+# Function to load data from JSON file (shared Job objects, not a per-call copy)
+def load_data():
+    return load_job_store().jobs
 
-# Function to load pre-calculated vectors
-@st.cache_data
-def load_job_vectors():
+# Function to open the vector store once per server process
+@st.cache_resource
+def load_search_engine():
     try:
-        # Download the pickle file from Google Drive
-        pkl_path = "job_vectors.pkl"
-        downloaded_path = download_from_drive(JOB_VECTORS_FILE_ID, pkl_path)
-        if downloaded_path:
-            with open(downloaded_path, "rb") as f:
-                job_vectors = pickle.load(f)
-            return job_vectors
-        else:
-            return {}
+        vectors = sync_datasets().get(JOB_VECTORS_FILE)
+        if vectors and not vectors["path"]:
+            vectors = None
+        # Convert the pickle once per version; later starts only mmap the store.
+        # Stores built by generate_embeddings.py (no recorded pickle) are left alone.
+        converted_sha256 = converted_from(VECTOR_STORE_DIR) if store_exists(VECTOR_STORE_DIR) else None
+        stale = converted_sha256 is not None and vectors and vectors.get("sha256") != converted_sha256
+        if not store_exists(VECTOR_STORE_DIR) or stale:
+            if not vectors:
+                return None
+            with tracer.span("data.convert_vectors"):
+                convert_pickle(vectors["path"], VECTOR_STORE_DIR, source_sha256=vectors.get("sha256"))
+        # Job metadata comes from the shared job store, so it is only in memory once.
+        # Uses the compressed copy and the IVF index when they match the store.
+        job_store = load_job_store()
+        # A stale compressed copy is reported and the full store searched instead
+        with tracer.span("data.load_vectors"), warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            engine = open_search_engine(VECTOR_STORE_DIR, job_store=job_store, compressed_dir=COMPRESSED_STORE_DIR)
+        for warning in caught:
+            st.warning(str(warning.message))
+        return engine
     except Exception as e:
-        st.error(f"Error loading job_vectors.pkl: {e}")
-        return {}
\ No newline at end of file
+        st.error(f"Error loading vector store: {e}")
+        return None
+
+# Function to build the Explore Jobs index once per server process
+@st.cache_resource
+def load_job_index():
+    return JobIndex(load_data())
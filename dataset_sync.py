@@ -0,0 +1,215 @@
+# dataset_sync.py
+# Downloads the data files only when they changed.
+#
+# A local manifest (data_manifest.json) records the version, size, SHA-256 and MD5 of
+# every artifact on disk. An artifact is downloaded again only if it is missing, its
+# size no longer matches the manifest, or the source reports a different
+# version/checksum. A source that reports nothing for a file (Drive without an API key)
+# cannot say whether it changed, so that copy is downloaded again once it is older than
+# max_age seconds; an identical download keeps its sha256, so nothing derived from it
+# is rebuilt. Downloads run concurrently and are written to a temp file that is renamed
+# into place.
+#
+# Sources:
+#   GoogleDriveSource    - the production Drive files; with an API key, their size and
+#                          md5Checksum come from the Drive API
+#   LocalDirectorySource - a directory, e.g. a mounted volume or test fixtures
+#   HTTPSource           - any static file server (stand-in for Drive when testing)
+# Directory and HTTP sources may publish a manifest.json with the same fields, which
+# is then used to detect changes without downloading.
+import hashlib
+import json
+import os
+import shutil
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_FILE = "data_manifest.json"
+HASH_CHUNK_BYTES = 1 << 20
+# Copies whose source reports no checksum are downloaded again after this long
+DEFAULT_MAX_AGE = 24 * 3600
+DRIVE_FILES_API = "https://www.googleapis.com/drive/v3/files/"
+
+
+def sha256_file(path):
+    return file_digests(path)[0]
+
+
+# (SHA-256, MD5) of a file in one pass; Drive reports MD5 only
+def file_digests(path):
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            sha256.update(block)
+            md5.update(block)
+    return sha256.hexdigest(), md5.hexdigest()
+
+
+class GoogleDriveSource:
+    def __init__(self, file_ids, api_key=None, timeout=30):
+        self.file_ids = file_ids
+        self.api_key = api_key
+        self.timeout = timeout
+
+    # {name: {"size", "md5"}} from the Drive API, or None without an API key.
+    # Files whose metadata cannot be read are left out (and fall back to max_age).
+    def fetch_manifest(self):
+        if not self.api_key:
+            return None
+        manifest = {}
+        for name, file_id in self.file_ids.items():
+            query = urllib.parse.urlencode({"fields": "size,md5Checksum", "key": self.api_key})
+            try:
+                with urllib.request.urlopen(f"{DRIVE_FILES_API}{file_id}?{query}", timeout=self.timeout) as response:
+                    metadata = json.load(response)
+            except (OSError, ValueError):
+                continue
+            if "md5Checksum" in metadata:
+                manifest[name] = {"size": int(metadata["size"]), "md5": metadata["md5Checksum"]}
+        return manifest
+
+    def download(self, name, output_path):
+        import gdown
+
+        url = f"https://drive.google.com/uc?id={self.file_ids[name]}"
+        if gdown.download(url, output_path, quiet=True) is None:
+            raise IOError(f"Could not download {name} from Google Drive")
+
+
+class LocalDirectorySource:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch_manifest(self):
+        path = os.path.join(self.directory, "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def download(self, name, output_path):
+        shutil.copyfile(os.path.join(self.directory, name), output_path)
+
+
+class HTTPSource:
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.timeout = timeout
+
+    def fetch_manifest(self):
+        try:
+            with urllib.request.urlopen(self.base_url + "manifest.json", timeout=self.timeout) as response:
+                return json.load(response)
+        except OSError:
+            return None
+
+    def download(self, name, output_path):
+        with urllib.request.urlopen(self.base_url + name, timeout=self.timeout) as response, \
+                open(output_path, "wb") as f:
+            shutil.copyfileobj(response, f, HASH_CHUNK_BYTES)
+
+
+# "drive" (default), a directory path, or an http(s):// URL
+def make_source(spec, drive_file_ids, drive_api_key=None):
+    if not spec or spec == "drive":
+        return GoogleDriveSource(drive_file_ids, api_key=drive_api_key)
+    if spec.startswith(("http://", "https://")):
+        return HTTPSource(spec)
+    return LocalDirectorySource(spec)
+
+
+class DatasetSync:
+    def __init__(self, source, data_dir=".", version="1", max_workers=4, max_age=DEFAULT_MAX_AGE):
+        self.source = source
+        self.data_dir = data_dir
+        self.version = str(version)
+        self.max_workers = max_workers
+        # None never re-checks copies the source reports nothing for
+        self.max_age = max_age
+        self.manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+
+    def _read_local_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_local_manifest(self, manifest):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # What the artifact should look like: the source manifest entry, or just the configured version
+    def _expected(self, name, remote_manifest):
+        entry = (remote_manifest or {}).get(name)
+        if entry:
+            return {key: entry[key] for key in ("version", "size", "sha256", "md5") if key in entry}
+        return {"version": self.version}
+
+    def _is_current(self, path, local_entry, expected):
+        if not local_entry or not os.path.exists(path):
+            return False
+        if os.path.getsize(path) != local_entry.get("size"):
+            return False
+        # Only the configured version to compare against: trust the copy for max_age
+        if set(expected) == {"version"} and self.max_age is not None:
+            if time.time() - local_entry.get("checked", 0) > self.max_age:
+                return False
+        return all(local_entry.get(key) == value for key, value in expected.items())
+
+    def _download(self, name, path, expected):
+        tmp_path = f"{path}.{os.getpid()}.part"
+        try:
+            self.source.download(name, tmp_path)
+            sha256, md5 = file_digests(tmp_path)
+            entry = {
+                "version": expected.get("version", self.version),
+                "size": os.path.getsize(tmp_path),
+                "sha256": sha256,
+                "md5": md5,
+                "checked": time.time(),
+            }
+            for key in ("size", "sha256", "md5"):
+                if key in expected and expected[key] != entry[key]:
+                    raise IOError(f"{name}: downloaded {key} {entry[key]} does not match {expected[key]}")
+            os.replace(tmp_path, path)
+            return entry
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # Make every artifact current; returns {name: {"path", "downloaded", "sha256", ...}}.
+    # A failed download gets an "error" and keeps the older copy on disk as its path,
+    # or path None if there is none, so one bad file does not block the others.
+    def sync(self, names):
+        os.makedirs(self.data_dir, exist_ok=True)
+        local_manifest = self._read_local_manifest()
+        remote_manifest = self.source.fetch_manifest()
+        results = {}
+        pending = {}
+        for name in names:
+            path = os.path.join(self.data_dir, name)
+            expected = self._expected(name, remote_manifest)
+            if self._is_current(path, local_manifest.get(name), expected):
+                results[name] = dict(local_manifest[name], path=path, downloaded=False)
+            else:
+                pending[name] = (path, expected)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                futures = {name: pool.submit(self._download, name, path, expected)
+                           for name, (path, expected) in pending.items()}
+            for name, future in futures.items():
+                path = pending[name][0]
+                try:
+                    local_manifest[name] = future.result()
+                    results[name] = dict(local_manifest[name], path=path, downloaded=True)
+                except Exception as e:
+                    results[name] = dict(local_manifest.get(name, {}), downloaded=False, error=str(e),
+                                         path=path if os.path.exists(path) else None)
+            self._write_local_manifest(local_manifest)
+        return results
@@ -0,0 +1,352 @@
+# dedup.py
+# Near-duplicate detection across scraper sources, run on the joined data before
+# embedding.
+#
+#   python dedup.py joined_data_standar.json joined_data_dedup.json
+#   python dedup.py joined_data_standar.json joined_data_dedup.json --store job_vectors_store
+#
+# Each description is split into word shingles and summarized by a MinHash signature.
+# LSH banding puts jobs whose signatures agree on a whole band in the same bucket, so
+# only jobs sharing a bucket are ever compared (no all-pairs pass). A pair counts as a
+# duplicate when the signatures agree on at least --jaccard of their positions, the
+# titles share enough words (one company's boilerplate under different roles is not
+# a duplicate), and, when both jobs already have vectors in --store, their embeddings
+# are at least --min-cosine similar. Pairs are merged into clusters with union-find.
+#
+# Each cluster keeps one canonical record (the most complete one) with the others'
+# id, source and link in its "alternates" field; only canonical records are written.
+# The input is read twice in streaming fashion, so the corpus is never loaded whole.
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from json_stream import iter_records
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs with Jaccard 0.8 share a bucket with probability ~0.95
+LSH_BANDS = 16
+SHINGLE_WORDS = 5
+JACCARD_THRESHOLD = 0.8
+TITLE_MIN_JACCARD = 0.5
+MIN_COSINE = 0.95
+# Buckets larger than this are boilerplate shared by unrelated jobs and are skipped
+MAX_BUCKET_SIZE = 500
+# Deduplicated copy written next to the job data (generate_embeddings.py --dedup)
+DEDUP_DATA_FILE = "joined_data_dedup.json"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _words(text):
+    return _WORD_RE.findall((text or "").lower())
+
+
+# CRC32 of each word shingle of the description (the whole text if it is shorter)
+def shingle_hashes(text, shingle_words=SHINGLE_WORDS):
+    words = _words(text)
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) <= shingle_words:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_words]) for i in range(len(words) - shingle_words + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64,
+                       count=len(shingles))
+
+
+class MinHasher:
+    """num_perm multiply-shift hashes ((a * x + b) mod 2^64) >> 32 of 32-bit shingle hashes."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=0):
+        rng = np.random.default_rng(seed)
+        # Random odd multipliers; uint64 arithmetic wraps, which is the mod 2^64
+        self.a = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)[:, None] | 1
+        self.b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)[:, None]
+        self.num_perm = num_perm
+
+    def signature(self, hashes):
+        if hashes.size == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        values = (self.a * hashes[None, :] + self.b) >> np.uint64(32)
+        return values.min(axis=1).astype(np.uint32)
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+# LSH buckets with more than one row: lists of rows whose signatures agree on a whole
+# band, one list per (band, bucket). Rows not in `rows` (e.g. jobs without a
+# description) are left out.
+def lsh_buckets(signatures, bands=LSH_BANDS, max_bucket_size=MAX_BUCKET_SIZE, rows=None):
+    rows_per_band = signatures.shape[1] // bands
+    rows = range(len(signatures)) if rows is None else rows
+    for band in range(bands):
+        buckets = defaultdict(list)
+        block = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+        for row in rows:
+            buckets[block[row].tobytes()].append(row)
+        for members in buckets.values():
+            if 1 < len(members) <= max_bucket_size:
+                yield members
+
+
+def _title_jaccard(a, b):
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return len(a & b) / len(a | b)
+
+
+# Completeness used to pick the canonical record of a cluster: longer description,
+# more skills, a link, then the earliest row
+def _completeness(info, row):
+    return (info["description_length"], info["skills"], bool(info["link"]), -row)
+
+
+class DedupResult:
+    def __init__(self, ids, canonical_of, infos, seconds, candidate_pairs, duplicate_pairs, embedding_checked):
+        self.ids = ids
+        # row -> row of its cluster's canonical record (itself for canonical rows)
+        self.canonical_of = canonical_of
+        self.infos = infos
+        self.seconds = seconds
+        self.candidate_pairs = candidate_pairs
+        self.duplicate_pairs = duplicate_pairs
+        self.embedding_checked = embedding_checked
+
+    # canonical row -> [duplicate rows], for clusters with more than one job
+    def clusters(self):
+        clusters = defaultdict(list)
+        for row, canonical in enumerate(self.canonical_of):
+            if row != canonical:
+                clusters[canonical].append(row)
+        return clusters
+
+    def report(self):
+        clusters = self.clusters()
+        cross_source = sum(
+            1 for canonical, rows in clusters.items()
+            if len({self.infos[row]["source"] for row in rows + [canonical]}) > 1
+        )
+        removed = sum(len(rows) for rows in clusters.values())
+        total = len(self.ids)
+        return {
+            "input_jobs": total,
+            "output_jobs": total - removed,
+            "removed_jobs": removed,
+            "reduction": removed / total if total else 0.0,
+            "clusters": len(clusters),
+            "cross_source_clusters": cross_source,
+            "candidate_pairs": self.candidate_pairs,
+            "duplicate_pairs": self.duplicate_pairs,
+            "embedding_checked_pairs": self.embedding_checked,
+            "seconds": self.seconds,
+        }
+
+
+# Find the near-duplicate clusters of the jobs in input_path. vectors is an optional
+# (job_ids, matrix) pair, e.g. from the previous vector store, for the embedding check.
+def find_duplicates(input_path, vectors=None, num_perm=NUM_PERM, bands=LSH_BANDS,
+                    jaccard=JACCARD_THRESHOLD, title_min_jaccard=TITLE_MIN_JACCARD, min_cosine=MIN_COSINE,
+                    shingle_words=SHINGLE_WORDS, seed=0):
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    start = time.perf_counter()
+    hasher = MinHasher(num_perm, seed=seed)
+    ids = []
+    infos = []
+    signatures = []
+    for job in iter_records(input_path):
+        description = job.get("description") or ""
+        ids.append(str(job.get("id")))
+        infos.append({
+            "title": frozenset(_words(job.get("title"))),
+            "source": job.get("source") or "",
+            "link": job.get("link") or "",
+            "description_length": len(description),
+            "skills": len(job.get("skills") or []),
+        })
+        signatures.append(hasher.signature(shingle_hashes(description, shingle_words)))
+    signatures = np.vstack(signatures) if signatures else np.empty((0, num_perm), dtype=np.uint32)
+
+    vector_row = {}
+    matrix = None
+    if vectors is not None:
+        vector_ids, matrix = vectors
+        vector_row = {str(job_id): row for row, job_id in enumerate(vector_ids)}
+
+    union_find = UnionFind(len(ids))
+    compared = set()
+    duplicate_pairs = 0
+    embedding_checked = 0
+
+    def is_duplicate(i, j):
+        nonlocal duplicate_pairs, embedding_checked
+        # Same id twice in the input is a plain duplicate
+        if ids[i] != ids[j]:
+            if np.count_nonzero(signatures[i] == signatures[j]) < jaccard * num_perm:
+                return False
+            if _title_jaccard(infos[i]["title"], infos[j]["title"]) < title_min_jaccard:
+                return False
+            row_i, row_j = vector_row.get(ids[i]), vector_row.get(ids[j])
+            if row_i is not None and row_j is not None:
+                embedding_checked += 1
+                cosine = float(np.dot(np.asarray(matrix[row_i], dtype=np.float32),
+                                      np.asarray(matrix[row_j], dtype=np.float32)))
+                if cosine < min_cosine:
+                    return False
+        duplicate_pairs += 1
+        return True
+
+    # Each bucket member is compared with every representative the bucket has accepted
+    # so far (one per cluster found in it) and joins the first that matches, or becomes
+    # a representative itself. A member that does not match the bucket's first row can
+    # still match a later one, and comparisons stay at members x clusters per bucket.
+    # An empty description says nothing about the posting; those jobs are never merged.
+    for members in lsh_buckets(signatures, bands=bands,
+                               rows=[row for row, info in enumerate(infos) if info["description_length"]]):
+        representatives = []
+        for row in members:
+            for representative in representatives:
+                if union_find.find(row) == union_find.find(representative):
+                    break
+                pair = (representative, row)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                if is_duplicate(representative, row):
+                    union_find.union(representative, row)
+                    break
+            else:
+                representatives.append(row)
+
+    members = defaultdict(list)
+    for row in range(len(ids)):
+        members[union_find.find(row)].append(row)
+    canonical_of = np.arange(len(ids))
+    for rows in members.values():
+        if len(rows) > 1:
+            canonical = max(rows, key=lambda row: _completeness(infos[row], row))
+            canonical_of[rows] = canonical
+    return DedupResult(ids, canonical_of, infos, time.perf_counter() - start, len(compared), duplicate_pairs,
+                       embedding_checked)
+
+
+# The deduplicated copy of a job data file (DEDUP_DATA_FILE in the same directory) when
+# it is at least as recent as the file, otherwise the file itself. The app and the HTTP
+# API load jobs through it, so they show the records a --dedup store was built from.
+def deduplicated_path(path, dedup_path=None):
+    dedup_path = dedup_path or os.path.join(os.path.dirname(path), DEDUP_DATA_FILE)
+    if os.path.exists(dedup_path) and os.path.getmtime(dedup_path) >= os.path.getmtime(path):
+        return dedup_path
+    return path
+
+
+# Write the canonical records of input_path to output_path (a JSON array, or JSON Lines
+# for .jsonl), each with the id, source and link of its duplicates in "alternates"
+def write_deduplicated(input_path, output_path, result):
+    alternates = defaultdict(list)
+    for canonical, rows in result.clusters().items():
+        # The same posting can appear in several rows (repeated id or link); list it once,
+        # and never list the canonical record itself
+        own_link = result.infos[canonical]["link"]
+        seen = set()
+        for row in rows:
+            info = result.infos[row]
+            if (result.ids[row] == result.ids[canonical] or (own_link and info["link"] == own_link)
+                    or (result.ids[row], info["link"]) in seen):
+                continue
+            seen.add((result.ids[row], info["link"]))
+            alternates[canonical].append({"id": result.ids[row], "source": info["source"], "link": info["link"]})
+    json_lines = output_path.endswith((".jsonl", ".ndjson"))
+    tmp_path = output_path + ".tmp"
+    written = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if not json_lines:
+            f.write("[\n")
+        for row, job in enumerate(iter_records(input_path)):
+            if result.canonical_of[row] != row:
+                continue
+            if row in alternates:
+                job = dict(job, alternates=alternates[row])
+            if not json_lines and written:
+                f.write(",\n")
+            f.write(json.dumps(job, ensure_ascii=False))
+            if json_lines:
+                f.write("\n")
+            written += 1
+        if not json_lines:
+            f.write("\n]\n")
+    os.replace(tmp_path, output_path)
+    return written
+
+
+def format_report(report, embed_rate=None):
+    lines = [
+        f"{report['input_jobs']} -> {report['output_jobs']} jobs: {report['removed_jobs']} duplicates removed "
+        f"({report['reduction']:.1%}) in {report['clusters']} clusters, {report['cross_source_clusters']} across sources",
+        f"{report['candidate_pairs']} LSH candidate pairs compared, {report['duplicate_pairs']} confirmed, "
+        f"{report['embedding_checked_pairs']} checked against stored embeddings; took {report['seconds']:.1f}s",
+    ]
+    if embed_rate:
+        lines.append(f"Embedding time saved: ~{report['removed_jobs'] / embed_rate:.0f}s at {embed_rate:.1f} jobs/s; "
+                     f"every search scans {report['reduction']:.1%} fewer rows")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove near-duplicate job postings across sources")
+    parser.add_argument("input", nargs="?", default="joined_data_standar.json")
+    parser.add_argument("output", nargs="?", default="joined_data_dedup.json")
+    parser.add_argument("--store", default=None, help="vector store whose embeddings confirm the candidate pairs")
+    parser.add_argument("--jaccard", type=float, default=JACCARD_THRESHOLD, help="minimum estimated Jaccard")
+    parser.add_argument("--min-cosine", type=float, default=MIN_COSINE)
+    parser.add_argument("--title-min-jaccard", type=float, default=TITLE_MIN_JACCARD)
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM)
+    parser.add_argument("--bands", type=int, default=LSH_BANDS)
+    parser.add_argument("--embed-rate", type=float, default=None,
+                        help="jobs/s of generate_embeddings.py, to estimate the time saved")
+    parser.add_argument("--report", default=None, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    vectors = None
+    if args.store:
+        from vector_store import load_vectors, store_exists
+
+        if store_exists(args.store):
+            vectors = load_vectors(args.store)
+        else:
+            print(f"No vector store in {args.store}, duplicates are confirmed by MinHash only")
+    result = find_duplicates(args.input, vectors=vectors, num_perm=args.num_perm, bands=args.bands,
+                             jaccard=args.jaccard, title_min_jaccard=args.title_min_jaccard,
+                             min_cosine=args.min_cosine)
+    write_deduplicated(args.input, args.output, result)
+    report = result.report()
+    print(format_report(report, args.embed_rate))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
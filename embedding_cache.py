@@ -0,0 +1,150 @@
+# embedding_cache.py
+# In-process LRU caches with an optional SQLite backing file, both with TTL and size
+# eviction. QueryEmbeddingCache lets repeated searches skip the embedding API call.
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# SQLite file backing the query embedding cache
+QUERY_CACHE_DB = "cache/query_embeddings.sqlite"
+# The SQLite file is trimmed (TTL and max_db_rows) once every this many writes, not on each one
+EVICT_EVERY_PUTS = 256
+
+
+# "  Python   Developer " and "python developer" share one cache entry.
+# bge-large-en-v1.5 uses an uncased tokenizer, so lowercasing does not change the embedding.
+def normalize_query(query):
+    return _WHITESPACE_RE.sub(" ", query).strip().lower()
+
+
+class PersistentLRUCache:
+    """String keys to values; subclasses define how values are stored in SQLite."""
+
+    table = "cache_entries"
+
+    def __init__(self, max_size=1024, ttl_seconds=7 * 24 * 3600, db_path=None, max_db_rows=100_000,
+                 evict_every=EVICT_EVERY_PUTS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_db_rows = max_db_rows
+        self.evict_every = evict_every
+        self._puts_since_evict = 0
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self.db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            # Eviction deletes by age; without this index every trim sorts the whole table
+            self.db.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_created ON {self.table} (created)")
+            self.db.commit()
+
+    def encode(self, value):
+        return value
+
+    def decode(self, stored):
+        return stored
+
+    def _expired(self, created, now):
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get_key(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created, now):
+                    self.memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self.memory[key]
+            if self.db is not None:
+                row = self.db.execute(
+                    f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    value = self.decode(row[0])
+                    self._remember(key, value, row[1])
+                    self.stats["disk_hits"] += 1
+                    return value
+            self.stats["misses"] += 1
+            return None
+
+    def put_key(self, key, value):
+        self.put_many([(key, value)])
+
+    # Store several (key, value) pairs with one INSERT statement and one commit
+    def put_many(self, items):
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with self.lock:
+            for key, value in items:
+                self._remember(key, value, now)
+            if self.db is not None:
+                self.db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created) VALUES (?, ?, ?)",
+                    ((key, self.encode(value), now) for key, value in items),
+                )
+                self._puts_since_evict += len(items)
+                if self._puts_since_evict >= self.evict_every:
+                    self._evict_db(now)
+                    self._puts_since_evict = 0
+                self.db.commit()
+
+    def _remember(self, key, value, created):
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def _evict_db(self, now):
+        if self.ttl_seconds is not None:
+            self.db.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl_seconds,))
+        self.db.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_db_rows,),
+        )
+
+
+class QueryEmbeddingCache(PersistentLRUCache):
+    table = "query_embedding_cache"
+
+    def encode(self, value):
+        return value.tobytes()
+
+    def decode(self, stored):
+        return np.frombuffer(stored, dtype=np.float32)
+
+    @staticmethod
+    def make_key(query, model):
+        return f"{model}\n{normalize_query(query)}"
+
+    def get(self, query, model):
+        return self.get_key(self.make_key(query, model))
+
+    def put(self, query, model, vector):
+        self.put_key(self.make_key(query, model), np.asarray(vector, dtype=np.float32))
+
+    # Return the cached embedding, or embed the normalized query with embed_fn and store it
+    def get_or_compute(self, query, model, embed_fn):
+        vector = self.get(query, model)
+        if vector is None:
+            vector = np.asarray(embed_fn(normalize_query(query)), dtype=np.float32)
+            self.put(query, model, vector)
+        return vector
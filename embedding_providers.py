@@ -0,0 +1,104 @@
+# embedding_providers.py
+# Interchangeable backends for turning a query into a bge-large-en-v1.5 vector.
+#
+#   together - Together's embedding endpoint (one HTTPS round trip per query)
+#   local    - the same model in-process via sentence-transformers, loaded once per process;
+#              quantize="int8" applies dynamic int8 quantization to the Linear layers,
+#              quantize="onnx" uses the sentence-transformers ONNX backend
+#   stub     - deterministic pseudo-random vectors, for offline runs and load tests
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+EMBEDDING_MODEL = "BAAI/bge-large-en-v1.5"
+
+
+class EmbeddingProvider:
+    # Unique per backend and settings; used as the model part of the query cache key
+    name = "base"
+
+    def embed(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, query):
+        return self.embed([query])[0]
+
+
+class TogetherEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, client, model=EMBEDDING_MODEL):
+        self.client = client
+        self.model = model
+        self.name = f"together:{model}"
+
+    def embed(self, texts):
+        response = self.client.embeddings.create(model=self.model, input=list(texts))
+        return np.asarray([item.embedding for item in response.data], dtype=np.float32)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model=EMBEDDING_MODEL, quantize=None, device="cpu"):
+        if quantize not in (None, "int8", "onnx"):
+            raise ValueError(f"Unknown quantization: {quantize}")
+        self.model_name = model
+        self.quantize = quantize
+        self.device = device
+        self.name = f"local:{model}" + (f":{quantize}" if quantize else "")
+        self._model = None
+        self._lock = threading.Lock()
+
+    # The model is loaded on first use, once per process
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.quantize == "onnx":
+            return SentenceTransformer(self.model_name, device=self.device, backend="onnx")
+        model = SentenceTransformer(self.model_name, device=self.device)
+        if self.quantize == "int8":
+            import torch
+
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def embed(self, texts):
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+class StubEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, dim=1024, delay=0.0):
+        self.dim = dim
+        # Seconds slept per call, to stand in for the remote round trip
+        self.delay = delay
+        self.name = f"stub:{dim}"
+
+    def embed(self, texts):
+        if self.delay:
+            time.sleep(self.delay)
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+            vectors[i] = np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def get_embedding_provider(backend, api_key=None, client=None, quantize=None):
+    if backend == "together":
+        if client is None:
+            from together import Together
+
+            client = Together(api_key=api_key)
+        return TogetherEmbeddingProvider(client)
+    if backend == "local":
+        return LocalEmbeddingProvider(quantize=quantize)
+    if backend == "stub":
+        return StubEmbeddingProvider()
+    raise ValueError(f"Unknown embedding backend: {backend}")
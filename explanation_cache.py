@@ -0,0 +1,103 @@
+# explanation_cache.py
+# Cache of AI explanations keyed by (kind, normalized query, ordered job ids, models,
+# prompt version). Only explanations that completed and parsed successfully are stored.
+#
+# Pre-warm popular queries at deploy time (one query per line):
+#   python explanation_cache.py popular_queries.txt
+import argparse
+import json
+import os
+import sys
+
+from embedding_cache import PersistentLRUCache, normalize_query
+from prompts import PROMPT_VERSION
+
+# SQLite file backing the explanation cache
+EXPLANATION_CACHE_DB = "cache/explanations.sqlite"
+
+
+class ExplanationCache(PersistentLRUCache):
+    table = "explanation_cache"
+
+    def __init__(self, max_size=512, ttl_seconds=24 * 3600, db_path=None, max_db_rows=20_000):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds, db_path=db_path, max_db_rows=max_db_rows)
+
+    def encode(self, value):
+        return json.dumps(value, ensure_ascii=False)
+
+    def decode(self, stored):
+        return json.loads(stored)
+
+    # kind is "overall" or "jobs" (one batch of per-job explanations)
+    @staticmethod
+    def make_key(kind, user_query, job_ids, models):
+        return json.dumps([kind, normalize_query(user_query), [str(job_id) for job_id in job_ids],
+                           list(models), PROMPT_VERSION])
+
+    def get(self, kind, user_query, job_ids, models):
+        return self.get_key(self.make_key(kind, user_query, job_ids, models))
+
+    def put(self, kind, user_query, job_ids, models, value):
+        self.put_key(self.make_key(kind, user_query, job_ids, models), value)
+
+
+# Settings from .streamlit/secrets.toml, for scripts run outside Streamlit ({} if there is none)
+def read_secrets():
+    import tomllib
+
+    path = os.path.join(".streamlit", "secrets.toml")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def read_together_api_key():
+    api_key = os.environ.get("TOGETHER_API_KEY")
+    if api_key:
+        return api_key
+    return read_secrets()["together"]["TOGETHER_API_KEY"]
+
+
+# Pre-warming goes through the app's own search path (same engine files, query filters,
+# hybrid ranking, re-ranker and number of explained jobs), so the job ids in each cache
+# key are the ones the AI Search page will ask for
+def main():
+    from explanations import EXPLAINED_JOBS, FALLBACK_MODEL, PRIMARY_MODEL
+    from search_api import DEFAULT_TOP_N, build_service
+
+    parser = argparse.ArgumentParser(description="Pre-warm the explanation cache for popular queries")
+    parser.add_argument("queries_file", help="text file with one query per line")
+    parser.add_argument("--store", default="job_vectors_store")
+    parser.add_argument("--compressed-store", default="job_vectors_store_compressed")
+    parser.add_argument("--data", default="joined_data_standar.json", help="job data, shared with the store")
+    parser.add_argument("--primary-model", default=PRIMARY_MODEL)
+    parser.add_argument("--fallback-model", default=FALLBACK_MODEL)
+    args = parser.parse_args()
+
+    with open(args.queries_file, "r", encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+
+    secrets = read_secrets()
+    embedding = secrets.get("embedding", {})
+    service = build_service(store=args.store, compressed_store=args.compressed_store, data=args.data,
+                            embedding_backend=embedding.get("backend", "together"),
+                            embedding_quantize=embedding.get("quantize"), rerank=secrets.get("rerank"), max_workers=1,
+                            primary_model=args.primary_model, fallback_model=args.fallback_model)
+    generator = service.explainer
+
+    for i, query in enumerate(queries, 1):
+        results, _ = service.search_results(query, DEFAULT_TOP_N)
+        top_jobs = results[:EXPLAINED_JOBS]
+        futures = generator.submit_job_explanations(top_jobs, query)
+        try:
+            "".join(generator.stream_overall_explanation(top_jobs, query))
+        except Exception as e:
+            print(f"[{i}/{len(queries)}] {query!r}: overall explanation failed: {e}", file=sys.stderr)
+        failed = sum(1 for future in futures if future.exception() is not None)
+        print(f"[{i}/{len(queries)}] {query!r}: {len(futures) - failed}/{len(futures)} job batches cached")
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
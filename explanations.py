@@ -0,0 +1,239 @@
+# explanations.py
+# Concurrent, streamed AI explanations for search results.
+#
+# Instead of one blocking 2048-token request for all ten jobs, the page:
+#   - renders the results straight away,
+#   - requests per-job explanations in small batches on a bounded thread pool,
+#   - streams the overall explanation token by token.
+# Every request is hedged: if the primary model has not answered (or produced its
+# first visible token) within hedge_after seconds, the fallback model is raced
+# against it and the first one to answer wins. With an ExplanationCache, finished
+# explanations are stored and served without calling either model.
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from prompts import get_job_explanations_prompt, get_overall_explanation_prompt
+from tracing import submit_traced, tracer
+
+# Free serverless models. Both names are part of every explanation cache key, so the
+# app, the HTTP API and the cache pre-warm all take them from here.
+PRIMARY_MODEL = "deepseek-ai/DeepSeek-R1-Distill-Llama-70B-free"
+FALLBACK_MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free"
+DEFAULT_HEDGE_AFTER = 8.0
+DEFAULT_BATCH_SIZE = 2
+DEFAULT_MAX_WORKERS = 4
+# Jobs sent to the LLM per search. Hybrid (BM25 + embedding) ranking puts the keyword
+# matches in the top results, so fewer jobs need explaining. The page, the HTTP API and
+# the cache pre-warm all explain this many, so their cache keys match.
+EXPLAINED_JOBS = 5
+
+_THINK_BLOCK_RE = re.compile(r"<think>[\s\S]*?</think>")
+_JSON_FENCE_RE = re.compile(r"```json\s*([\s\S]*?)\s*```")
+
+_DONE = object()
+
+
+# Strip <think> blocks and ```json fences, then parse; raises json.JSONDecodeError
+def parse_json_response(text):
+    with tracer.span("explanation.parse"):
+        text = _THINK_BLOCK_RE.sub("", text).strip()
+        json_match = _JSON_FENCE_RE.search(text)
+        json_str = json_match.group(1).strip() if json_match else text
+        return json.loads(json_str)
+
+
+class ThinkFilter:
+    """Drops <think>...</think> blocks from a token stream, even when tags are split across tokens."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.thinking = False
+
+    def feed(self, token):
+        self.buffer += token
+        output = []
+        while True:
+            tag = "</think>" if self.thinking else "<think>"
+            index = self.buffer.find(tag)
+            if index >= 0:
+                if not self.thinking:
+                    output.append(self.buffer[:index])
+                self.buffer = self.buffer[index + len(tag):]
+                self.thinking = not self.thinking
+                continue
+            # Keep a possible partial tag at the end of the buffer for the next token
+            keep = next((n for n in range(len(tag) - 1, 0, -1) if self.buffer.endswith(tag[:n])), 0)
+            if not self.thinking:
+                output.append(self.buffer[:len(self.buffer) - keep])
+            self.buffer = self.buffer[len(self.buffer) - keep:]
+            return "".join(output)
+
+    def flush(self):
+        text = "" if self.thinking else self.buffer
+        self.buffer = ""
+        return text
+
+
+class ExplanationGenerator:
+    def __init__(self, client, primary_model, fallback_model, hedge_after=DEFAULT_HEDGE_AFTER,
+                 max_workers=DEFAULT_MAX_WORKERS, temperature=0.7, cache=None):
+        self.client = client
+        self.cache = cache
+        self.primary_model = primary_model
+        self.fallback_model = fallback_model
+        self.hedge_after = hedge_after
+        self.temperature = temperature
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="explanations")
+
+    @property
+    def models(self):
+        return (self.primary_model, self.fallback_model)
+
+    def _complete(self, model, prompt, max_tokens):
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+        )
+        return response.choices[0].message.content
+
+    # Primary request, plus the fallback once hedge_after passes or the primary fails
+    def hedged_completion(self, prompt, max_tokens, parse=None):
+        def attempt(model):
+            text = self._complete(model, prompt, max_tokens)
+            return parse(text) if parse else text
+
+        # Not a with-block: leaving it would wait for the losing request to finish
+        hedge_pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            pending = {hedge_pool.submit(attempt, self.primary_model)}
+            fallback_started = False
+            errors = []
+            while pending:
+                timeout = None if fallback_started else self.hedge_after
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    errors.append(future.exception())
+                if not fallback_started:
+                    pending.add(hedge_pool.submit(attempt, self.fallback_model))
+                    fallback_started = True
+            raise errors[-1]
+        finally:
+            hedge_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _explain_batch(self, batch, user_query):
+        prompt = get_job_explanations_prompt(batch, user_query)
+        with tracer.span("llm.job_batch"):
+            explanations = self.hedged_completion(prompt, max_tokens=200 * len(batch) + 100,
+                                                  parse=parse_json_response)
+        explanations = {str(job_id): str(text) for job_id, text in explanations.items()}
+        if self.cache is not None:
+            self.cache.put("jobs", user_query, [job_id for job_id, _, _ in batch], self.models, explanations)
+        return explanations
+
+    # Submit one request per batch of jobs; returns {future: [job_id, ...]}
+    def submit_job_explanations(self, jobs, user_query, batch_size=DEFAULT_BATCH_SIZE):
+        futures = {}
+        for start in range(0, len(jobs), batch_size):
+            batch = jobs[start:start + batch_size]
+            job_ids = [job_id for job_id, _, _ in batch]
+            cached = self.cache.get("jobs", user_query, job_ids, self.models) if self.cache is not None else None
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+            else:
+                future = submit_traced(self.executor, self._explain_batch, batch, user_query)
+            futures[future] = job_ids
+        return futures
+
+    def _stream_into(self, model, prompt, max_tokens, out, stop):
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=self.temperature,
+                stream=True,
+            )
+            think_filter = ThinkFilter()
+            for chunk in stream:
+                if stop.is_set():
+                    return
+                if not chunk.choices:
+                    continue
+                text = think_filter.feed(chunk.choices[0].delta.content or "")
+                if text:
+                    out.put((model, text))
+            text = think_filter.flush()
+            if text:
+                out.put((model, text))
+            out.put((model, _DONE))
+        except Exception as e:
+            out.put((model, e))
+
+    # Yield the overall explanation as it is generated. The first model to produce a
+    # visible token is kept; the other stream is stopped.
+    def stream_overall_explanation(self, jobs, user_query, max_tokens=512):
+        job_ids = [job_id for job_id, _, _ in jobs]
+        if self.cache is not None:
+            cached = self.cache.get("overall", user_query, job_ids, self.models)
+            if cached is not None:
+                yield cached
+                return
+        prompt = get_overall_explanation_prompt(jobs, user_query)
+        start = time.perf_counter()
+        out = queue.Queue()
+        stop = threading.Event()
+        threading.Thread(target=self._stream_into, args=(self.primary_model, prompt, max_tokens, out, stop),
+                         daemon=True).start()
+        running = {self.primary_model}
+        fallback_started = False
+        chosen = None
+        error = None
+        completed = False
+        tokens = []
+        try:
+            while running:
+                try:
+                    timeout = None if fallback_started or chosen else self.hedge_after
+                    model, item = out.get(timeout=timeout)
+                except queue.Empty:
+                    model, item = None, None
+                if model is not None and chosen not in (None, model):
+                    continue
+                if isinstance(item, Exception) or item is _DONE:
+                    running.discard(model)
+                    if isinstance(item, Exception):
+                        error = item
+                    if chosen == model:
+                        completed = item is _DONE
+                        break
+                elif item is not None:
+                    if chosen is None:
+                        tracer.timing("llm.overall.first_token", time.perf_counter() - start)
+                    chosen = model
+                    tokens.append(item)
+                    yield item
+                    continue
+                # Primary is slow or failed before its first visible token: race the fallback
+                if chosen is None and not fallback_started:
+                    threading.Thread(target=self._stream_into,
+                                     args=(self.fallback_model, prompt, max_tokens, out, stop),
+                                     daemon=True).start()
+                    running.add(self.fallback_model)
+                    fallback_started = True
+        finally:
+            stop.set()
+            tracer.timing("llm.overall", time.perf_counter() - start)
+        if chosen is None and error is not None:
+            raise error
+        # Only a stream that ran to completion is cached
+        if completed and self.cache is not None:
+            self.cache.put("overall", user_query, job_ids, self.models, "".join(tokens))
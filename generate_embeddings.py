@@ -1,26 +1,304 @@
+import argparse
+import hashlib
 import json
+import os
 import pickle
-from sentence_transformers import SentenceTransformer
-
-print("Cargando el modelo BAAI/bge-large-en-v1.5...")
-model = SentenceTransformer("BAAI/bge-large-en-v1.5")
-print("Modelo cargado.")
-
-print("Cargando el archivo JSON...")
-with open("joined_data_standar.json", "r", encoding="utf-8") as f:
-    job_offers = json.load(f)
-print(f"Se cargaron {len(job_offers)} ofertas.")
-
-job_vectors = {}
-for i, job in enumerate(job_offers):
-    print(f"Procesando oferta {i + 1}/{len(job_offers)}: {job['title']}")
-    job_text = f"Title: {job['title']}. Description: {job['description']}. Skills: {', '.join(job['skills'])}"
-    embedding = model.encode(job_text)  # Embedding completo: shape=(1024,)
-    # Verificar las dimensiones del embedding
-    print(f"Dimensión del embedding para oferta {i + 1}: {embedding.shape}")
-    job_vectors[job["id"]] = {"embedding": embedding.tolist(), "data": job}  # Guardar el vector completo
-
-print("Guardando los vectores en job_vectors.pkl...")
-with open("job_vectors.pkl", "wb") as f:
-    pickle.dump(job_vectors, f)
-print("Espacio vectorial creado y guardado en job_vectors.pkl")
\ No newline at end of file
+import shutil
+import time
+
+import numpy as np
+
+from dedup import DEDUP_DATA_FILE
+from json_stream import iter_records
+from search_engine import EMBEDDING_DIM
+from vector_store import VectorStoreWriter, load_hashes, load_vectors, store_exists
+
+MODEL_NAME = "BAAI/bge-large-en-v1.5"
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+# Texto que se embebe para cada oferta
+def build_job_text(job):
+    return f"Title: {job['title']}. Description: {job['description']}. Skills: {', '.join(job['skills'])}"
+
+
+# Hash del texto embebido (y del modelo): si no cambia, el vector guardado sigue siendo válido
+def content_hash(job, model_name):
+    return hashlib.sha1(f"{model_name}\n{build_job_text(job)}".encode("utf-8")).hexdigest()
+
+
+class PreviousVectors:
+    """Vectores del vector store existente, indexados por id de oferta y hash de contenido."""
+
+    def __init__(self, store_dir):
+        self.rows = {}
+        self.matrix = None
+        if store_dir is None or not store_exists(store_dir):
+            return
+        hashes = load_hashes(store_dir)
+        if hashes is None:
+            print(f"{store_dir} no tiene hashes de contenido, se embebe todo.")
+            return
+        job_ids, self.matrix = load_vectors(store_dir)
+        self.rows = {job_id: (row, job_hash) for row, (job_id, job_hash) in enumerate(zip(job_ids, hashes))}
+
+    def __len__(self):
+        return len(self.rows)
+
+    # Fila del vector reutilizable para la oferta, o None si es nueva o ha cambiado
+    def find(self, job_id, job_hash):
+        found = self.rows.get(job_id)
+        if found is None or found[1] != job_hash:
+            return None
+        return found[0]
+
+
+# Agrupa las ofertas del JSON (leído en streaming) en chunks de tamaño fijo
+def iter_chunks(records, chunk_size):
+    chunk = []
+    for job in records:
+        chunk.append(job)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Checkpoint:
+    """Chunks ya embebidos en disco, para que una ejecución interrumpida continúe donde se quedó."""
+
+    def __init__(self, directory, input_path, chunk_size, model_name):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        state = {
+            "version": CHECKPOINT_FORMAT_VERSION,
+            "input": os.path.abspath(input_path),
+            "input_size": os.path.getsize(input_path),
+            "input_mtime": os.path.getmtime(input_path),
+            "chunk_size": chunk_size,
+            "model": model_name,
+        }
+        state_path = os.path.join(directory, "state.json")
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                if json.load(f) != state:
+                    # Otro fichero de entrada, modelo o chunk_size: los chunks guardados no sirven
+                    print("El checkpoint no corresponde a esta ejecución, se descarta.")
+                    self.clear()
+                    os.makedirs(directory, exist_ok=True)
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def path(self, index):
+        return os.path.join(self.directory, f"chunk_{index:06d}.npy")
+
+    def has(self, index):
+        return os.path.exists(self.path(index))
+
+    def save(self, index, embeddings):
+        tmp_path = self.path(index) + ".tmp.npy"
+        np.save(tmp_path, embeddings)
+        os.replace(tmp_path, self.path(index))
+
+    def load(self, index):
+        return np.load(self.path(index))
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def load_model(model_name):
+    from sentence_transformers import SentenceTransformer
+
+    print(f"Cargando el modelo {model_name}...")
+    model = SentenceTransformer(model_name)
+    print("Modelo cargado.")
+    return model
+
+
+# Embebe un chunk ordenando los textos por longitud para reducir el padding de cada batch
+def encode_chunk(model, texts, batch_size, pool=None):
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    sorted_texts = [texts[i] for i in order]
+    if pool is not None:
+        sorted_embeddings = model.encode_multi_process(
+            sorted_texts, pool, batch_size=batch_size, normalize_embeddings=True
+        )
+    else:
+        sorted_embeddings = model.encode(
+            sorted_texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+    embeddings = np.empty_like(sorted_embeddings, dtype=np.float32)
+    embeddings[order] = sorted_embeddings
+    return embeddings
+
+
+# Escribe en output_path solo la oferta canónica de cada grupo de duplicados. Los vectores
+# del vector store existente, si lo hay, confirman los pares candidatos. Si output_path es
+# más reciente que la entrada se reutiliza, para no invalidar el checkpoint al reanudar.
+# En modo incremental, solo ahorran tiempo de embedding las ofertas quitadas que no tenían
+# un vector reutilizable en previous; el informe lo guarda en "embedding_jobs_saved".
+def deduplicate_input(input_path, output_path, store_dir, previous, model_name):
+    from dedup import find_duplicates, format_report, write_deduplicated
+
+    if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(input_path):
+        print(f"{output_path} ya está deduplicado, se reutiliza.")
+        return None
+    vectors = load_vectors(store_dir) if store_exists(store_dir) else None
+    result = find_duplicates(input_path, vectors=vectors)
+    write_deduplicated(input_path, output_path, result)
+    report = result.report()
+    print(format_report(report))
+    report["embedding_jobs_saved"] = report["removed_jobs"]
+    if len(previous) and report["removed_jobs"]:
+        report["embedding_jobs_saved"] = sum(
+            1 for row, job in enumerate(iter_records(input_path))
+            if result.canonical_of[row] != row and previous.find(job["id"], content_hash(job, model_name)) is None
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los embeddings de las ofertas")
+    parser.add_argument("--input", default="joined_data_standar.json")
+    parser.add_argument("--output", default="job_vectors_store", help="directorio del vector store")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--chunk-size", type=int, default=2048, help="ofertas por checkpoint")
+    parser.add_argument("--workers", type=int, default=1, help="procesos de encoding en CPU")
+    parser.add_argument("--checkpoint-dir", default="embedding_checkpoint")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reutilizar los vectores del vector store para las ofertas sin cambios")
+    parser.add_argument("--float16", action="store_true")
+    parser.add_argument("--pickle", action="store_true", help="escribir también job_vectors.pkl (formato antiguo)")
+    parser.add_argument("--compress-output", default=None,
+                        help="directorio para una copia comprimida del vector store (ver compression.py); "
+                             "incluye su propio índice IVF si el vector store tiene uno")
+    parser.add_argument("--compress-dim", type=int, default=None, help="dimensiones de la copia comprimida")
+    parser.add_argument("--compress-method", choices=["pca", "truncate"], default="pca")
+    parser.add_argument("--int8", action="store_true", help="cuantizar la copia comprimida a int8")
+    parser.add_argument("--min-recall", type=float, default=None,
+                        help="no escribir la copia comprimida si su recall@10 queda por debajo")
+    parser.add_argument("--dedup", action="store_true",
+                        help="quitar ofertas casi duplicadas entre fuentes antes de embeber (ver dedup.py)")
+    parser.add_argument("--dedup-output", default=DEDUP_DATA_FILE, help="fichero deduplicado")
+    parser.add_argument("--alerts", action="store_true",
+                        help="comparar las búsquedas guardadas con las ofertas nuevas (ver saved_searches.py)")
+    args = parser.parse_args()
+
+    previous = PreviousVectors(args.output) if args.incremental else PreviousVectors(None)
+    if args.incremental:
+        print(f"Modo incremental: {len(previous)} vectores existentes en {args.output}")
+
+    dedup_report = None
+    if args.dedup:
+        dedup_report = deduplicate_input(args.input, args.dedup_output, args.output, previous, args.model)
+        args.input = args.dedup_output
+
+    # El modelo solo se carga si hay alguna oferta nueva o modificada
+    model = None
+    pool = None
+    checkpoint = Checkpoint(args.checkpoint_dir, args.input, args.chunk_size, args.model)
+    start_time = time.perf_counter()
+    encoded_jobs = 0
+    reused_jobs = 0
+    total_jobs = 0
+    seen_ids = set()
+    dim = previous.matrix.shape[1] if previous.matrix is not None else None
+    try:
+        for index, chunk in enumerate(iter_chunks(iter_records(args.input), args.chunk_size)):
+            total_jobs += len(chunk)
+            seen_ids.update(job["id"] for job in chunk)
+            if checkpoint.has(index):
+                continue
+            previous_rows = [previous.find(job["id"], content_hash(job, args.model)) for job in chunk]
+            pending = [i for i, row in enumerate(previous_rows) if row is None]
+            if pending and model is None:
+                model = load_model(args.model)
+                dim = model.get_sentence_embedding_dimension()
+                if args.workers > 1:
+                    pool = model.start_multi_process_pool(target_devices=["cpu"] * args.workers)
+            embeddings = np.empty((len(chunk), dim), dtype=np.float32)
+            for i, row in enumerate(previous_rows):
+                if row is not None:
+                    embeddings[i] = previous.matrix[row]
+            if pending:
+                texts = [build_job_text(chunk[i]) for i in pending]
+                embeddings[pending] = encode_chunk(model, texts, args.batch_size, pool)
+            checkpoint.save(index, embeddings)
+            encoded_jobs += len(pending)
+            reused_jobs += len(chunk) - len(pending)
+            rate = encoded_jobs / (time.perf_counter() - start_time)
+            print(f"Chunk {index + 1}: {total_jobs} ofertas procesadas ({rate:.1f} ofertas/s)")
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+    encode_seconds = time.perf_counter() - start_time
+
+    print(f"Guardando los vectores en {args.output}...")
+    if dim is None:
+        # Sin ofertas (entrada vacía o todas filtradas) no hay chunk 0: se escribe un
+        # vector store vacío con la dimensión por defecto
+        dim = checkpoint.load(0).shape[1] if total_jobs else EMBEDDING_DIM
+    dtype = np.float16 if args.float16 else np.float32
+    writer = VectorStoreWriter(args.output, total_jobs, dim, dtype=dtype)
+    job_ids = []
+    jobs = []
+    hashes = []
+    legacy_vectors = {} if args.pickle else None
+    for index, chunk in enumerate(iter_chunks(iter_records(args.input), args.chunk_size)):
+        embeddings = checkpoint.load(index)
+        writer.write(len(jobs), embeddings)
+        for job, embedding in zip(chunk, embeddings):
+            job_ids.append(job["id"])
+            jobs.append(job)
+            hashes.append(content_hash(job, args.model))
+            if legacy_vectors is not None:
+                legacy_vectors[job["id"]] = {"embedding": embedding.tolist(), "data": job}
+    removed_jobs = sum(1 for job_id in previous.rows if job_id not in seen_ids)
+    previous = None
+    writer.close(job_ids, jobs, hashes)
+    if legacy_vectors is not None:
+        with open("job_vectors.pkl", "wb") as f:
+            pickle.dump(legacy_vectors, f)
+    checkpoint.clear()
+
+    rate = encoded_jobs / encode_seconds if encode_seconds else 0.0
+    print(f"Espacio vectorial con {total_jobs} ofertas guardado en {args.output}")
+    if args.incremental:
+        print(f"Reutilizadas {reused_jobs} ofertas, eliminadas {removed_jobs} que ya no existen")
+    print(f"Embebidas {encoded_jobs} ofertas en {encode_seconds:.1f}s ({rate:.1f} ofertas/s)")
+    if dedup_report and rate:
+        saved = dedup_report["embedding_jobs_saved"]
+        print(f"Deduplicación: {dedup_report['removed_jobs']} ofertas menos ({saved} sin vector reutilizable), "
+              f"~{saved / rate:.0f}s de embedding ahorrados ({dedup_report['seconds']:.1f}s de deduplicación)")
+
+    # Avisos de búsquedas guardadas: solo se puntúan las ofertas que no se habían visto
+    if args.alerts:
+        from saved_searches import run_alerts
+
+        summary = run_alerts(args.output)
+        if summary["baseline"]:
+            print(f"Búsquedas guardadas: primera ejecución, {summary['jobs']} ofertas marcadas como vistas")
+        else:
+            print(f"Búsquedas guardadas: {summary['new_jobs']} ofertas nuevas, {summary['alerts']} avisos nuevos")
+
+    # La copia comprimida se genera a partir del vector store completo, que se conserva
+    # para el modo incremental
+    if args.compress_output and not total_jobs:
+        print("Sin ofertas, no se genera la copia comprimida.")
+    elif args.compress_output:
+        from compression import compress_store, format_report
+
+        try:
+            report = compress_store(args.output, args.compress_output, dim=args.compress_dim,
+                                    method=args.compress_method, int8=args.int8, min_recall=args.min_recall)
+        except ValueError as e:
+            print(f"Copia comprimida descartada: {e}")
+        else:
+            print(f"Copia comprimida guardada en {args.compress_output}: {format_report(report)}")
+
+
+if __name__ == "__main__":
+    main()
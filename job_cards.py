@@ -0,0 +1,125 @@
+# job_cards.py
+# Shared job card rendering for the AI Search and Explore Jobs pages.
+#
+# Cards are built from one template compiled at import time and memoized by job id,
+# and pages only render the current page of results, so the HTML sent on each rerun
+# stays the same size however many jobs match.
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import streamlit as st
+
+CARD_CACHE_SIZE = 5000
+
+# Split around the optional "% match" span so the cached parts don't depend on the query
+_CARD_HEAD = """
+<div class="job-card">
+    <div class="job-title">{title}</div>
+    <div class="job-company">{company}</div>
+    <div class="job-details">
+        <span>📍 {location}</span>
+        <span>📅 {date}</span>
+        <span>🔍 {source}</span>""".format_map
+_CARD_TAIL = """
+    </div>
+    {skills_html}{alternates_html}
+    <div class="job-link">
+        <a href="{link}" target="_blank" class="view-job-button">View job</a>
+    </div>
+</div>
+""".format_map
+_MATCH_SPAN = "\n        <span>📊 {}% match</span>".format
+_SKILL_TAG = '<span class="skill-tag">{}</span>'.format
+_ALTERNATE_LINK = '<a href="{link}" target="_blank">{source}</a>'.format_map
+_NO_SKILLS_HTML = '<div class="job-skills"><span class="skill-tag">No skills specified</span></div>'
+EXPLANATION_HTML = '<div class="job-explanation"><h4>Why this job?</h4><p>{}</p></div>'.format
+
+# job_id -> (job, card parts). A hit needs the very same job object: a reloaded job
+# store has new Job objects, so refreshed postings never get the old HTML.
+_card_cache = OrderedDict()
+_card_cache_lock = threading.Lock()
+
+
+def format_date(date_str):
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%d %b, %Y")
+    except (TypeError, ValueError):
+        return date_str
+
+
+def _card_parts(job_id, job):
+    with _card_cache_lock:
+        cached = _card_cache.get(job_id)
+        if cached is not None and cached[0] is job:
+            _card_cache.move_to_end(job_id)
+            return cached[1]
+    skills = job.get("skills", [])
+    if skills:
+        skills_html = '<div class="job-skills">' + "".join(_SKILL_TAG(skill) for skill in skills) + '</div>'
+    else:
+        skills_html = _NO_SKILLS_HTML
+    # Near-duplicates of this posting on other sources, merged by dedup.py
+    alternates = [alternate for alternate in job.get("alternates") or () if alternate.get("link")]
+    alternates_html = ""
+    if alternates:
+        alternates_html = ('\n    <div class="job-alternates">Also posted on: '
+                           + ", ".join(_ALTERNATE_LINK({"link": alternate["link"],
+                                                        "source": alternate.get("source") or "link"})
+                                       for alternate in alternates)
+                           + '</div>')
+    parts = (
+        _CARD_HEAD({
+            "title": job.get("title", ""),
+            "company": job.get("company", ""),
+            "location": job.get("location", ""),
+            "date": format_date(job.get("date", "")),
+            "source": job.get("source", ""),
+        }),
+        _CARD_TAIL({"skills_html": skills_html, "alternates_html": alternates_html, "link": job.get("link", "")}),
+    )
+    with _card_cache_lock:
+        _card_cache[job_id] = (job, parts)
+        _card_cache.move_to_end(job_id)
+        while len(_card_cache) > CARD_CACHE_SIZE:
+            _card_cache.popitem(last=False)
+    return parts
+
+
+# similarity (0-1) adds the "% match" badge used on AI Search
+def job_card_html(job_id, job, similarity=None):
+    head, tail = _card_parts(job_id, job)
+    if similarity is None:
+        return head + tail
+    return head + _MATCH_SPAN(round(similarity * 100, 2)) + tail
+
+
+# Page controls; returns the (start, stop) slice of the items to render.
+# The page goes back to the first one whenever reset_token changes (e.g. new filters).
+def paginate(total, page_size, key, reset_token=None):
+    state = st.session_state.setdefault(key, {"page": 0, "token": reset_token})
+    if state["token"] != reset_token:
+        state["page"] = 0
+        state["token"] = reset_token
+    n_pages = max(1, math.ceil(total / page_size))
+    state["page"] = min(state["page"], n_pages - 1)
+    if n_pages > 1:
+        # on_click runs before the rerun, so both buttons see the new page
+        def move(step):
+            state["page"] += step
+
+        previous_col, label_col, next_col = st.columns([1, 2, 1])
+        previous_col.button("← Previous", key=f"{key}_previous", disabled=state["page"] == 0,
+                            on_click=move, args=(-1,))
+        next_col.button("Next →", key=f"{key}_next", disabled=state["page"] == n_pages - 1,
+                        on_click=move, args=(1,))
+        label_col.write(f"Page {state['page'] + 1} of {n_pages}")
+    start = state["page"] * page_size
+    return start, min(start + page_size, total)
+
+
+# Render a page of (job_id, job) cards as a single markdown element
+def render_job_cards(jobs):
+    html = '<hr>'.join(job_card_html(job_id, job) for job_id, job in jobs)
+    st.markdown(html, unsafe_allow_html=True)
@@ -0,0 +1,120 @@
+# job_index.py
+# Prebuilt index for the Explore Jobs page, built once per process:
+#   - a token inverted index over title, company, skills and description,
+#   - integer-coded company/source/location/type columns with precomputed facet counts,
+#   - filters combined as boolean bitmaps (one bit per job) with &.
+import bisect
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+FACET_FIELDS = ("company", "source", "location", "type")
+TEXT_FIELDS = ("title", "company", "skills", "description")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Prefix masks kept for the last keystrokes typed in the search box
+PREFIX_CACHE_SIZE = 64
+# Shorter terms only match whole tokens, otherwise "a" would expand to most of the vocabulary
+MIN_PREFIX_LENGTH = 2
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _field_text(job, field):
+    value = job.get(field) or ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return str(value)
+
+
+class JobIndex:
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.size = len(jobs)
+
+        # Facet columns: codes[field][row] indexes into labels[field] (sorted)
+        self.labels = {}
+        self.codes = {}
+        self.counts = {}
+        for field in FACET_FIELDS:
+            values = [str(job.get(field) or "") for job in jobs]
+            labels, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+            self.labels[field] = labels.tolist()
+            self.codes[field] = codes.astype(np.int32)
+            self.counts[field] = np.bincount(self.codes[field], minlength=len(labels))
+
+        # Inverted index: token -> sorted array of rows containing it
+        postings = {}
+        for row, job in enumerate(jobs):
+            tokens = set()
+            for field in TEXT_FIELDS:
+                tokens.update(tokenize(_field_text(job, field)))
+            for token in tokens:
+                postings.setdefault(token, []).append(row)
+        self.vocabulary = sorted(postings)
+        self.postings = {token: np.array(rows, dtype=np.int32) for token, rows in postings.items()}
+        self._prefix_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def all_rows(self):
+        return np.ones(self.size, dtype=bool)
+
+    def facet_mask(self, field, label):
+        position = bisect.bisect_left(self.labels[field], label)
+        if position == len(self.labels[field]) or self.labels[field][position] != label:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes[field] == position
+
+    # Jobs containing a token that starts with prefix ("pyth" matches "python")
+    def prefix_mask(self, prefix):
+        with self._lock:
+            mask = self._prefix_cache.get(prefix)
+            if mask is not None:
+                self._prefix_cache.move_to_end(prefix)
+                return mask
+        mask = np.zeros(self.size, dtype=bool)
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            if prefix in self.postings:
+                mask[self.postings[prefix]] = True
+        else:
+            start = bisect.bisect_left(self.vocabulary, prefix)
+            end = bisect.bisect_left(self.vocabulary, prefix + "\U0010ffff")
+            if end > start:
+                mask[np.concatenate([self.postings[token] for token in self.vocabulary[start:end]])] = True
+        with self._lock:
+            self._prefix_cache[prefix] = mask
+            while len(self._prefix_cache) > PREFIX_CACHE_SIZE:
+                self._prefix_cache.popitem(last=False)
+        return mask
+
+    # Every term of the search box must match some token in title/company/skills/description
+    def text_mask(self, search_term):
+        mask = self.all_rows()
+        for term in tokenize(search_term):
+            mask &= self.prefix_mask(term)
+        return mask
+
+    def filter(self, facets=None, search_term=""):
+        mask = self.all_rows()
+        for field, label in (facets or {}).items():
+            if label is not None:
+                mask &= self.facet_mask(field, label)
+        if search_term:
+            mask &= self.text_mask(search_term)
+        return mask
+
+    # {label: count} for one facet, over all jobs or only the rows in mask
+    def facet_counts(self, field, mask=None):
+        if mask is None:
+            counts = self.counts[field]
+        else:
+            counts = np.bincount(self.codes[field][mask], minlength=len(self.labels[field]))
+        return dict(zip(self.labels[field], counts.tolist()))
+
+    def rows(self, mask):
+        return np.flatnonzero(mask)
@@ -0,0 +1,135 @@
+# job_store.py
+# Single in-memory copy of the job metadata, shared by both pages and the vector store.
+#
+# Records are streamed from joined_data_standar.json (or a .jsonl file), validated and
+# normalized once, and kept as __slots__ Job objects with repeated strings (company,
+# source, location, type) interned. Job keeps the dict-style get()/[] access the rest
+# of the app uses.
+import os
+import sys
+
+from json_stream import iter_records
+
+# Field -> kind; every job gets every field, missing or null values become "" / ()
+JOB_FIELDS = {
+    "id": "str",
+    "title": "str",
+    "company": "interned",
+    "location": "interned",
+    "date": "str",
+    "source": "interned",
+    "type": "interned",
+    "link": "str",
+    "skills": "list",
+    "description": "str",
+    # Near-duplicates merged into this job by dedup.py: ({"id", "source", "link"}, ...)
+    "alternates": "records",
+}
+
+
+class Job:
+    __slots__ = tuple(JOB_FIELDS)
+
+    def get(self, key, default=None):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            return default
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in JOB_FIELDS
+
+    def keys(self):
+        return JOB_FIELDS.keys()
+
+    def to_dict(self):
+        job = {field: getattr(self, field) for field in JOB_FIELDS}
+        job["skills"] = list(job["skills"])
+        job["alternates"] = [dict(alternate) for alternate in job["alternates"]]
+        return job
+
+    def __repr__(self):
+        return f"Job(id={self.id!r}, title={self.title!r})"
+
+
+class InvalidJob(ValueError):
+    pass
+
+
+def normalize_job(record):
+    if not isinstance(record, dict):
+        raise InvalidJob(f"Expected a JSON object, got {type(record).__name__}")
+    if record.get("id") in (None, ""):
+        raise InvalidJob("Job without id")
+    job = Job()
+    for field, kind in JOB_FIELDS.items():
+        value = record.get(field)
+        if kind == "list":
+            if value is None:
+                value = ()
+            elif isinstance(value, str):
+                value = tuple(skill.strip() for skill in value.split(",") if skill.strip())
+            elif isinstance(value, (list, tuple)):
+                value = tuple(str(skill).strip() for skill in value if skill is not None and str(skill).strip())
+            else:
+                raise InvalidJob(f"Job {record.get('id')}: {field} must be a list")
+        elif kind == "records":
+            if not isinstance(value, (list, tuple)):
+                value = ()
+            value = tuple(
+                {"id": str(item.get("id") or ""), "source": sys.intern(str(item.get("source") or "")),
+                 "link": str(item.get("link") or "")}
+                for item in value if isinstance(item, dict)
+            )
+        else:
+            value = "" if value is None else str(value).strip()
+            if kind == "interned":
+                value = sys.intern(value)
+        setattr(job, field, value)
+    return job
+
+
+class JobStore:
+    def __init__(self, jobs, invalid=0, source=""):
+        self.jobs = jobs
+        self.invalid = invalid
+        # Identifies the file the jobs were read from (its dataset sha256 when known),
+        # so indexes built from them can be reused without re-reading every job
+        self.source = source
+        self.row_of = {job.id: row for row, job in enumerate(jobs)}
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def get(self, job_id):
+        row = self.row_of.get(str(job_id))
+        return None if row is None else self.jobs[row]
+
+
+# Stream and normalize every record; invalid ones and duplicate ids are skipped and counted.
+# source defaults to the file's size and modification time.
+def load_job_store(path, source=None):
+    jobs = []
+    seen = set()
+    invalid = 0
+    for record in iter_records(path):
+        try:
+            job = normalize_job(record)
+        except InvalidJob:
+            invalid += 1
+            continue
+        if job.id in seen:
+            invalid += 1
+            continue
+        seen.add(job.id)
+        jobs.append(job)
+    if source is None:
+        stat = os.stat(path)
+        source = f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return JobStore(jobs, invalid=invalid, source=source)
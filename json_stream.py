@@ -0,0 +1,72 @@
+# json_stream.py
+# Incremental readers for job files, so a whole corpus never has to be json.load-ed at once.
+import json
+
+READ_CHUNK_CHARS = 1 << 20
+
+
+# Yield the elements of a top-level JSON array one at a time
+def iter_json_array(path, chunk_chars=READ_CHUNK_CHARS):
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        while not buffer:
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                break
+            buffer = chunk.lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        eof = False
+        while True:
+            # Skip whitespace and separators between elements
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer, pos = f.read(chunk_chars), 0
+                eof = not buffer
+            if pos >= len(buffer):
+                raise ValueError(f"{path} ended before the closing ']'")
+            if buffer[pos] == "]":
+                return
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    more = f.read(chunk_chars)
+                    eof = not more
+                    buffer = buffer[pos:] + more
+                    pos = 0
+                    continue
+                # A number at the very end of the buffer may still be cut in half
+                if end == len(buffer) and not eof:
+                    more = f.read(chunk_chars)
+                    if more:
+                        buffer = buffer[pos:] + more
+                        pos = 0
+                        continue
+                    eof = True
+                break
+            yield item
+            pos = end
+
+
+# Yield one record per non-empty line of a JSON Lines file
+def iter_json_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+# Pick the reader from the file extension (.jsonl / .ndjson are JSON Lines)
+def iter_records(path):
+    if path.endswith((".jsonl", ".ndjson")):
+        return iter_json_lines(path)
+    return iter_json_array(path)
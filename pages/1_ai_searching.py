@@ -1,21 +1,41 @@
 import streamlit as st
+import contextvars
 import os
-from datetime import datetime
 import sys
-import json
+import threading
+import time
+from concurrent.futures import Future, as_completed
 
-# Add the parent directory to sys.path to import functions from streamlit_app.py and data_loader.py
+# Add the parent directory to sys.path to import functions from app_core.py and data_loader.py
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from streamlit_app import (
-    get_query_embedding, 
-    get_top_similar_jobs, 
-    generate_ai_explanation,
-    TOGETHER_API_KEY,
-    DEEPSEEK_MODEL,
-    LLAMA_MODEL
+from app_core import (
+    configure_page,
+    get_query_embedding,
+    get_top_similar_jobs,
+    get_explanation_generator,
+    get_query_filter,
+    get_embedding_cache,
+    get_together_api_key,
+    get_saved_searches,
+    render_debug_panel,
+    rerank_results,
+    save_search,
 )
-from data_loader import load_job_vectors  # Importamos load_job_vectors desde data_loader
-from together import Together
+from data_loader import load_search_engine  # Importamos load_search_engine desde data_loader
+from query_filters import describe_rule
+from explanation_cache import ExplanationCache
+from explanations import EXPLAINED_JOBS
+from job_cards import EXPLANATION_HTML, job_card_html, paginate
+from saved_searches import DEFAULT_THRESHOLD
+from tracing import profile_block, start_trace, tracer
+
+RESULTS_PER_PAGE = 10
+# How often the page redraws the overall explanation while it streams
+STREAM_POLL_SECONDS = 0.05
+
+configure_page()
+# Spans of this run, shown in the sidebar debug panel when tracing is on
+trace = start_trace("ai_search")
 
 # Load CSS from the styles.css file in the root directory
 def load_css(css_file):
@@ -30,8 +50,31 @@ except FileNotFoundError:
     parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     load_css(os.path.join(parent_dir, 'styles.css'))
 
+# Function to stream the overall explanation in a background thread into a list kept in
+# session_state, so a rerun (paging, saving the search) shows what has arrived instead
+# of requesting it again. Returns (tokens, future done when the stream ends).
+def start_overall_explanation(explainer, jobs, user_query):
+    tokens = []
+    future = Future()
+
+    def run():
+        try:
+            for token in explainer.stream_overall_explanation(jobs, user_query):
+                tokens.append(token)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result("".join(tokens))
+
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True).start()
+    return tokens, future
+
+# Function to render the overall explanation box
+def show_overall_explanation(placeholder, text, cursor=""):
+    placeholder.markdown(f'<div class="overall-explanation"><h3>💡 Results Analysis</h3><p>{text}{cursor}</p></div>', unsafe_allow_html=True)
+
 # Cargar los datos al inicio de la página
-job_vectors = load_job_vectors()
+job_vectors = load_search_engine()
 
 st.title("AI Search")
 st.write("Search for job offers using a IA query.")
@@ -41,79 +84,141 @@ show_ai_explanations = st.checkbox("Show AI explanations", value=True)
 
 if st.button("Search Jobs"):
     if user_query:
-        with st.spinner("Searching for relevant job offers..."):
-            os.environ['TOGETHER_API_KEY'] = TOGETHER_API_KEY
-            client = Together()
-            query_embedding = get_query_embedding(user_query, TOGETHER_API_KEY)
-            
-            if job_vectors:
-                top_jobs = get_top_similar_jobs(query_embedding, job_vectors)
-                if top_jobs:
-                    ai_explanations = {}
-                    if show_ai_explanations:
-                        with st.spinner("Generating AI explanations..."):
-                            # Enviar solo los primeros 10 trabajos para las explicaciones
-                            ai_explanations = generate_ai_explanation(top_jobs[:10], user_query, client)
-                    
-                    # Display overall explanation if available
-                    if show_ai_explanations and ai_explanations and "overall_explanation" in ai_explanations:
-                        st.markdown(f'<div class="overall-explanation"><h3>💡 Results Analysis</h3><p>{ai_explanations["overall_explanation"]}</p></div>', unsafe_allow_html=True)
-                    elif show_ai_explanations:
-                        st.markdown('<div class="overall-explanation"><h3>💡 Results Analysis</h3><p>No overall explanation available.</p></div>', unsafe_allow_html=True)
-                    
-                    st.write(f"Showing the {len(top_jobs)} most relevant job offers:")
-
-                    for job_id, similarity, job in top_jobs:
-                        with st.container():
-                            date_str = job.get("date", "")
-                            try:
-                                date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                                formatted_date = date_obj.strftime("%d %b, %Y")
-                            except:
-                                formatted_date = date_str
-                            
-                            # Calcular el porcentaje de coincidencia
-                            match_percentage = round(similarity * 100, 2)  # Convertir similarity a porcentaje y redondear a 2 decimales
-                            
-                            # Generar HTML para las skills
-                            skills = job.get("skills", [])
-                            if skills:
-                                skills_html = '<div class="job-skills">'
-                                for skill in skills:
-                                    skills_html += f'<span class="skill-tag">{skill}</span>'
-                                skills_html += '</div>'
-                            else:
-                                skills_html = '<div class="job-skills"><span class="skill-tag">No skills specified</span></div>'
-                            
-                            # Construir el HTML de la tarjeta con el % match
-                            job_html = f"""
-                            <div class="job-card">
-                                <div class="job-title">{job.get("title", "")}</div>
-                                <div class="job-company">{job.get("company", "")}</div>
-                                <div class="job-details">
-                                    <span>📍 {job.get("location", "")}</span>
-                                    <span>📅 {formatted_date}</span>
-                                    <span>🔍 {job.get("source", "")}</span>
-                                    <span>📊 {match_percentage}% match</span>
-                                </div>
-                                {skills_html}
-                                <div class="job-link">
-                                    <a href="{job.get("link", "")}" target="_blank" class="view-job-button">View job</a>
-                                </div>
-                            </div>
-                            """
-                            # Renderizar la tarjeta
-                            st.markdown(job_html, unsafe_allow_html=True)
-
-                            # Mostrar la explicación individual debajo de la tarjeta
-                            if show_ai_explanations and ai_explanations and "job_explanations" in ai_explanations and job_id in ai_explanations["job_explanations"]:
-                                explanation_text = ai_explanations["job_explanations"][job_id]
-                                st.markdown(f'<div class="job-explanation"><h4>Why this job?</h4><p>{explanation_text}</p></div>', unsafe_allow_html=True)
-
-                            st.markdown("---")
-                else:
-                    st.error("No relevant jobs found for your query.")
-            else:
-                st.error("Could not load job vectors.")
+        if job_vectors:
+            profile_search = st.session_state.get("debug_profile_next", False) and tracer.enabled
+            # Solo se perfila una búsqueda; la casilla se desmarca antes de dibujarse
+            st.session_state["debug_profile_next"] = False
+            with st.spinner("Searching for relevant job offers..."), profile_block(enabled=profile_search):
+                # Exclusions in the query ("not freelance", "without python") filter jobs before ranking
+                query_filter = get_query_filter()
+                with tracer.span("query_filter"):
+                    filter_rules = query_filter.parse(user_query)
+                query_embedding = get_query_embedding(user_query, get_together_api_key())
+                top_jobs = get_top_similar_jobs(query_embedding, job_vectors, mask=query_filter.mask_for(filter_rules),
+                                              query_text=user_query)
+                # Optional local cross-encoder pass over the best results
+                top_jobs = rerank_results(user_query, top_jobs)
+            # Guardar los resultados para poder paginar sin repetir la búsqueda
+            st.session_state["ai_search"] = {"query": user_query, "top_jobs": top_jobs, "filter_rules": filter_rules}
+        else:
+            st.error("Could not load job vectors.")
     else:
-        st.warning("Please enter a query to search for jobs.")
\ No newline at end of file
+        st.session_state.pop("ai_search", None)
+        st.warning("Please enter a query to search for jobs.")
+
+search = st.session_state.get("ai_search")
+if search:
+    search_query = search["query"]
+    top_jobs = search["top_jobs"]
+    if search["filter_rules"]:
+        st.caption("Filters applied: " + "; ".join(describe_rule(rule) for rule in search["filter_rules"]))
+
+    # Saved searches are matched against new postings offline (python saved_searches.py match)
+    with st.expander("Save this search and get alerts for new job offers"):
+        threshold = st.slider("Minimum semantic similarity", 0.5, 1.0, DEFAULT_THRESHOLD, 0.01,
+                              key="save_search_threshold",
+                              help="Cosine similarity between your query and a new job offer's embedding. "
+                                   "It is not the \"% match\" on the cards, which also includes keyword matching.")
+        if st.button("Save search"):
+            search_id = save_search(search_query, threshold)
+            # Solo se listan las búsquedas guardadas en esta sesión, no las de otros usuarios
+            session_ids = st.session_state.setdefault("saved_search_ids", [])
+            if search_id not in session_ids:
+                session_ids.append(search_id)
+            st.success(f"Saved '{search_query}'. New job offers with a semantic similarity of at least "
+                       f"{threshold:.2f} will show up in your alerts.")
+
+    if top_jobs:
+        # Explanations are requested in the background; results are rendered first
+        explainer = get_explanation_generator(get_together_api_key()) if show_ai_explanations else None
+        explained_jobs = top_jobs[:EXPLAINED_JOBS]  # Enviar solo los primeros trabajos para las explicaciones
+        overall_placeholder = st.empty()
+
+        st.write(f"Showing the {len(top_jobs)} most relevant job offers:")
+        start, stop = paginate(len(top_jobs), RESULTS_PER_PAGE, key="ai_search_page", reset_token=search_query)
+        page_jobs = top_jobs[start:stop]
+
+        explained_ids = {str(job_id) for job_id, _, _ in explained_jobs}
+        page_ids = {str(job_id) for job_id, _, _ in page_jobs}
+        page_explained = [item for item in explained_jobs if str(item[0]) in page_ids]
+        job_futures = {}
+        if explainer:
+            # Requests (in flight or finished) are kept per search, so reruns reuse them and
+            # only a new query, new explained jobs or new models/prompts request them again
+            explanation_key = ExplanationCache.make_key("overall", search_query,
+                                                        [job_id for job_id, _, _ in explained_jobs], explainer.models)
+            explanation_state = st.session_state.get("ai_explanations")
+            if not explanation_state or explanation_state["key"] != explanation_key:
+                overall_tokens, overall_future = start_overall_explanation(explainer, explained_jobs, search_query)
+                explanation_state = {"key": explanation_key, "overall_tokens": overall_tokens,
+                                     "overall_future": overall_future, "job_futures": {}}
+                st.session_state["ai_explanations"] = explanation_state
+            page_key = tuple(str(job_id) for job_id, _, _ in page_explained)
+            if page_key not in explanation_state["job_futures"]:
+                explanation_state["job_futures"][page_key] = explainer.submit_job_explanations(page_explained, search_query)
+            job_futures = explanation_state["job_futures"][page_key]
+        explanation_placeholders = {}
+
+        with tracer.span("render"):
+            for job_id, similarity, job in page_jobs:
+                # Renderizar la tarjeta con el % match
+                st.markdown(job_card_html(job_id, job, similarity), unsafe_allow_html=True)
+
+                # Hueco para la explicación individual, se rellena cuando llegue
+                if explainer and str(job_id) in explained_ids:
+                    explanation_placeholders[str(job_id)] = st.empty()
+
+                st.markdown("---")
+
+        if explainer:
+            # Mostrar cada explicación individual en cuanto llega, también mientras se escribe la general
+            pending_futures = set(job_futures)
+
+            def show_job_explanations(futures):
+                for future in futures:
+                    pending_futures.discard(future)
+                    try:
+                        job_explanations = future.result()
+                    except Exception:
+                        continue
+                    for job_id, explanation_text in job_explanations.items():
+                        if job_id in explanation_placeholders:
+                            explanation_placeholders[job_id].markdown(EXPLANATION_HTML(explanation_text), unsafe_allow_html=True)
+
+            # Show the overall explanation in the box above the results as it streams in
+            overall_tokens = explanation_state["overall_tokens"]
+            overall_future = explanation_state["overall_future"]
+            shown_tokens = -1
+            while not overall_future.done():
+                if len(overall_tokens) != shown_tokens:
+                    shown_tokens = len(overall_tokens)
+                    show_overall_explanation(overall_placeholder, "".join(overall_tokens[:shown_tokens]), "▌")
+                show_job_explanations([future for future in pending_futures if future.done()])
+                time.sleep(STREAM_POLL_SECONDS)
+            if overall_future.exception() is not None:
+                st.error(f"Error generating explanations: {str(overall_future.exception())}")
+            overall_text = "".join(overall_tokens)
+            if not overall_text.strip():
+                overall_text = "No overall explanation available."
+            show_overall_explanation(overall_placeholder, overall_text)
+
+            # Las que aún no han llegado
+            show_job_explanations(as_completed(list(pending_futures)))
+    else:
+        st.error("No relevant jobs found for your query.")
+
+cache_stats = get_embedding_cache().stats
+st.sidebar.caption(
+    f"Query embedding cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+    f"{cache_stats['misses']} misses"
+)
+
+# Saved searches of this session and their undelivered alerts
+saved_list = get_saved_searches().list(st.session_state.get("saved_search_ids", []))
+if saved_list:
+    st.sidebar.subheader("Saved searches")
+    for saved_search in saved_list:
+        st.sidebar.caption(f"{saved_search['query']}: {saved_search['pending']} new alerts")
+
+# Latency breakdown of this run (only shown when tracing is on)
+render_debug_panel()
@@ -1,7 +1,10 @@
 import json
 
-def get_ai_explanation_prompt(jobs, user_query):
-    # Prepare job data for the model (limited to essential fields)
+# Bump whenever any prompt below changes, so cached explanations are regenerated
+PROMPT_VERSION = "2"
+
+# Prepare job data for the model (limited to essential fields)
+def _prompt_job_data(jobs):
     job_data = []
     for job_id, similarity, job in jobs:
         job_data.append({
@@ -13,22 +16,40 @@ def get_ai_explanation_prompt(jobs, user_query):
             "type": job.get("type", ""),
             "similarity_score": f"{similarity:.4f}"
         })
-    
+    return job_data
+
+
+# Overall explanation only, as plain text so it can be streamed token by token
+def get_overall_explanation_prompt(jobs, user_query):
     return f"""
 You are an AI career assistant helping to explain job recommendations.
 
 USER QUERY: "{user_query}"
 
 JOB LISTINGS (ordered by relevance):
-{json.dumps(job_data, indent=2)}
-
-Your task:
-1. Provide a brief overview explaining how these jobs match the user's search query.
-2. For each job, provide a short personalized explanation of why it might be a good fit based on the query.
-3. If any jobs don't fully match some criteria in the query (like location preferences, experience level, job type), mention it.
-4. Format your response as a JSON with these keys:
-   - "overall_explanation": A paragraph explaining the overall match
-   - "job_explanations": A dictionary with job IDs as keys and explanations as values
-
-Keep explanations concise and focused on the match between query and job requirements.
-"""
\ No newline at end of file
+{json.dumps(_prompt_job_data(jobs), indent=2)}
+
+Write one short paragraph explaining how these jobs match the user's search query overall.
+If some jobs don't fully match criteria in the query (like location preferences, experience level, job type), mention it.
+Answer with the paragraph only: plain text, no JSON, no headings, no <think> blocks.
+"""
+
+
+# Explanations for a small batch of jobs, requested concurrently with the other batches
+def get_job_explanations_prompt(jobs, user_query):
+    return f"""
+You are an AI career assistant helping to explain job recommendations.
+
+USER QUERY: "{user_query}"
+
+JOB LISTINGS:
+{json.dumps(_prompt_job_data(jobs), indent=2)}
+
+For each job, provide a short personalized explanation (1-2 sentences) of why it might be a good fit based on the query.
+If a job doesn't fully match some criteria in the query (like location preferences, experience level, job type), mention it.
+Return **only** a valid JSON object with job IDs as keys and explanations as values, for example:
+```json
+{{"job_id_1": "Explanation for job 1", "job_id_2": "Explanation for job 2"}}
+```
+Do **not** include any additional text, comments, or <think> blocks outside the JSON.
+"""
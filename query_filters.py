@@ -0,0 +1,191 @@
+# query_filters.py
+# Turns exclusions in an AI Search query ("not freelance", "without python",
+# "more than 5 years of experience") into boolean masks over the jobs, using the rules
+# generated by create_rules.py. The masks are applied before top-N selection, so
+# excluded jobs never take a result slot.
+#
+# Rules are matched with an Aho-Corasick automaton (one pass over the query for all
+# patterns) and job columns are precomputed once; the mask for each (field, value) is
+# computed on first use and cached, so a query only costs a few vectorized ANDs.
+import json
+import os
+import re
+import threading
+from collections import deque
+
+import numpy as np
+
+FILTER_RULES_FILE = "filter_rules.json"
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)", re.IGNORECASE)
+
+
+def load_rules(path=FILTER_RULES_FILE):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["rules"]
+    # filter_rules.json is generated output; build the same rules in memory if it is missing
+    from create_rules import generate_rules
+
+    return generate_rules()
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton over lowercase patterns, with whole-word matching."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(pattern)
+
+    def _build_failure_links(self):
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self.goto[state].items():
+                pending.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    # Patterns that occur in text as whole words, in order of their end position
+    def find(self, text):
+        matches = []
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for pattern in self.output[state]:
+                start = end - len(pattern) + 1
+                before_ok = start == 0 or not text[start - 1].isalnum()
+                after_ok = end + 1 == len(text) or not text[end + 1].isalnum()
+                if before_ok and after_ok:
+                    matches.append(pattern)
+        return matches
+
+
+# " data science intern " for "Data-Science Intern": lowercase alphanumeric tokens
+# joined and padded with spaces, so " intern " is a whole-word test on the result
+def token_text(text):
+    return " " + " ".join(_TOKEN_RE.findall(str(text or "").lower())) + " "
+
+
+def _required_years(description):
+    years = [int(match) for match in _YEARS_RE.findall(description or "")]
+    return min(years) if years else np.nan
+
+
+class JobColumns:
+    """Columnar copies of the job fields the rules look at, in engine row order.
+
+    Text fields are kept as token_text() strings, so exclusions match whole words:
+    "not intern" keeps "International Sales" and "not in uk" keeps "Milwaukee, WI".
+    """
+
+    def __init__(self, jobs):
+        self.title = [token_text(job.get("title")) for job in jobs]
+        self.location = [token_text(job.get("location")) for job in jobs]
+        self.type = [token_text(job.get("type")) for job in jobs]
+        self.skills = [{str(skill).lower() for skill in job.get("skills") or []} for job in jobs]
+        self.required_years = np.array([_required_years(job.get("description")) for job in jobs], dtype=np.float32)
+
+    def __len__(self):
+        return len(self.title)
+
+
+class QueryFilter:
+    def __init__(self, jobs, rules=None):
+        rules = load_rules() if rules is None else rules
+        self.rules_by_pattern = {}
+        for rule in rules:
+            self.rules_by_pattern.setdefault(rule["pattern"].lower(), []).append(rule)
+        self.matcher = PatternMatcher(self.rules_by_pattern)
+        self.columns = JobColumns(jobs)
+        self._masks = {}
+        self._lock = threading.Lock()
+
+    # Rules whose pattern appears in the query, without duplicates
+    def parse(self, user_query):
+        seen = set()
+        matched = []
+        for pattern in self.matcher.find(user_query.lower()):
+            for rule in self.rules_by_pattern[pattern]:
+                key = (rule["field"], rule["condition"], rule["value"])
+                if key not in seen:
+                    seen.add(key)
+                    matched.append(rule)
+        return matched
+
+    # Boolean mask of the jobs a single rule keeps
+    def rule_mask(self, rule):
+        key = (rule["field"], rule["condition"], rule["value"])
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._compute_mask(*key)
+            with self._lock:
+                self._masks[key] = mask
+        return mask
+
+    def _compute_mask(self, field, condition, value):
+        columns = self.columns
+        if condition == "not_contains":
+            if field == "skills":
+                value = value.lower()
+                excluded = (value in skills for skills in columns.skills)
+            else:
+                value = token_text(value)
+                excluded = (value in text for text in getattr(columns, field))
+            return ~np.fromiter(excluded, dtype=bool, count=len(columns))
+
+        # Experience rules compare against the years required in the description;
+        # jobs that do not state a number of years are kept
+        years = columns.required_years
+        value = float(value)
+        unknown = np.isnan(years)
+        with np.errstate(invalid="ignore"):
+            if condition in ("less_than", "under"):
+                keep = years < value
+            elif condition in ("more_than", "over"):
+                keep = years > value
+            elif condition == "at_least":
+                keep = years >= value
+            else:
+                raise ValueError(f"Unknown rule condition: {condition}")
+        return keep | unknown
+
+    # Combined mask for the query, or None when no rule matched
+    def mask_for(self, rules):
+        if not rules:
+            return None
+        mask = self.rule_mask(rules[0]).copy()
+        for rule in rules[1:]:
+            mask &= self.rule_mask(rule)
+        return mask
+
+
+def describe_rule(rule):
+    if rule["condition"] == "not_contains":
+        return f"{rule['field']} excludes {rule['value']}"
+    return f"{rule['condition'].replace('_', ' ')} {rule['value']} years of experience"
@@ -0,0 +1,139 @@
+# reranker.py
+# Optional re-ranking of the best search results with a small local cross-encoder.
+#
+# The cross-encoder reads the query and each job text together, which orders the top of
+# the list better than embedding similarity alone. Only the first top_k results are
+# scored, in batches, within a latency budget: a batch is skipped when its estimated
+# cost (from the warm-up and earlier batches) would overrun the budget, and if the
+# budget has passed once a batch finishes, the original order is kept. Scores are cached
+# per (model, normalized query, job id), including those of batches that finished late,
+# so repeating a query needs fewer new predictions. The model is loaded and warmed when
+# the re-ranker is created (reranker_from_settings), not on the first search.
+import threading
+import time
+
+import numpy as np
+
+from embedding_cache import PersistentLRUCache, normalize_query
+from generate_embeddings import build_job_text
+
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+# SQLite file backing the re-ranking score cache
+RERANK_CACHE_DB = "cache/rerank_scores.sqlite"
+# Job text passed to the cross-encoder is cut here (the model reads at most 512 tokens)
+RERANK_MAX_CHARS = 1500
+
+
+class RerankScoreCache(PersistentLRUCache):
+    table = "rerank_score_cache"
+
+    def __init__(self, max_size=50_000, ttl_seconds=7 * 24 * 3600, db_path=None, max_db_rows=500_000):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds, db_path=db_path, max_db_rows=max_db_rows)
+
+    def encode(self, value):
+        return repr(float(value))
+
+    def decode(self, stored):
+        return float(stored)
+
+    @staticmethod
+    def make_key(model, query, job_id):
+        return f"{model}\n{normalize_query(query)}\n{job_id}"
+
+
+class CrossEncoderReranker:
+    def __init__(self, model=RERANK_MODEL, top_k=20, budget_ms=150, batch_size=16, cache=None, device="cpu"):
+        self.model_name = model
+        self.top_k = top_k
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.cache = cache
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+        # Estimated seconds per (query, job) pair, measured by warm() and every batch
+        self.pair_seconds = None
+
+    # The model is loaded on first use, once per process; warm() does it up front
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+
+    def predict(self, query, texts):
+        start = time.perf_counter()
+        scores = np.asarray(self.model.predict([(query, text) for text in texts], batch_size=self.batch_size,
+                                               show_progress_bar=False), dtype=np.float32)
+        seconds = (time.perf_counter() - start) / max(len(texts), 1)
+        self.pair_seconds = seconds if self.pair_seconds is None else 0.8 * self.pair_seconds + 0.2 * seconds
+        return scores
+
+    # Load the model and score one full batch, so the first search neither pays for the
+    # load nor goes into its budget without a cost estimate
+    def warm(self):
+        self.predict("warm up", ["warm up"] * self.batch_size)
+        return self
+
+    # Scores of the (job_id, job) pairs, or None if the budget ran out first.
+    # budget_ms=None scores everything (used by the offline evaluation).
+    def score(self, query, jobs, budget_ms=None):
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        scores = np.empty(len(jobs), dtype=np.float32)
+        pending = []
+        for i, (job_id, _) in enumerate(jobs):
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get_key(RerankScoreCache.make_key(self.model_name, query, job_id))
+            if cached is None:
+                pending.append(i)
+            else:
+                scores[i] = cached
+        query_text = normalize_query(query)
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            # Stop before a batch that would likely overrun the budget; without an
+            # estimate (never warmed) the model load alone would, so give up
+            if deadline is not None and (self.pair_seconds is None or
+                                         time.perf_counter() + self.pair_seconds * len(batch) > deadline):
+                return None
+            texts = [build_job_text(jobs[i][1])[:RERANK_MAX_CHARS] for i in batch]
+            scores[batch] = self.predict(query_text, texts)
+            if self.cache is not None:
+                # One INSERT and one commit per batch
+                self.cache.put_many((RerankScoreCache.make_key(self.model_name, query, jobs[i][0]), scores[i])
+                                    for i in batch)
+            # A batch that finished late is cached above but not used
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+        return scores
+
+    # Reorder the first top_k (job_id, similarity, job) results by cross-encoder score.
+    # Returns (results, reranked); similarities are kept for the "% match" badge.
+    def rerank(self, query, results, top_k=None):
+        head = results[:top_k or self.top_k]
+        if len(head) < 2:
+            return results, False
+        scores = self.score(query, [(job_id, job) for job_id, _, job in head], budget_ms=self.budget_ms)
+        if scores is None:
+            return results, False
+        order = np.argsort(-scores, kind="stable")
+        return [head[i] for i in order] + results[len(head):], True
+
+
+# Re-ranker from the [rerank] section of secrets.toml, or None when it is disabled
+# (shared by the app, the HTTP API and the explanation pre-warm). The model is loaded
+# and warmed here, once per process.
+def reranker_from_settings(settings, db_path=RERANK_CACHE_DB):
+    if not settings.get("enabled", False):
+        return None
+    return CrossEncoderReranker(
+        model=settings.get("model", RERANK_MODEL),
+        top_k=settings.get("top_k", 20),
+        budget_ms=settings.get("budget_ms", 150),
+        cache=RerankScoreCache(db_path=db_path),
+    ).warm()
@@ -0,0 +1,313 @@
+# saved_searches.py
+# Saved AI Search queries, matched in one batch against the jobs that are new in the
+# vector store instead of being re-run by hand every day.
+#
+# Each saved search keeps its query embedding and a cosine-similarity threshold; all of
+# them together form one (searches, dim) matrix. When new jobs land in the store, that
+# matrix is multiplied by the new rows only (one matrix-matrix product per block of
+# jobs), exclusions in the query ("not freelance") are applied as in AI Search, and the
+# matches above each search's threshold are written to an outbox table. The digest
+# command prints the undelivered alerts grouped by search and marks them delivered.
+#
+#   python saved_searches.py add "Data engineer Spark Airflow" --threshold 0.8
+#   python saved_searches.py list
+#   python saved_searches.py match job_vectors_store       # generate_embeddings.py --alerts does this
+#   python saved_searches.py digest --output digest.md
+#
+# Jobs already in the store the first time match runs are taken as seen, so the first
+# run does not alert on the whole catalogue. Scores and thresholds are plain cosine
+# similarities against the full-precision store (no BM25, no re-ranking), so they are
+# not comparable with the fused "% match" that hybrid AI Search shows.
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from embedding_cache import normalize_query
+
+# SQLite file with the saved searches, the jobs already matched and the alerts outbox
+SAVED_SEARCHES_DB = "saved_searches.sqlite"
+DEFAULT_THRESHOLD = 0.8
+# New jobs scored per matrix-matrix product, so (searches x block) scores stay small
+MATCH_BLOCK_ROWS = 8192
+# At most this many alerts per search and run; the best ones are kept
+MAX_ALERTS_PER_SEARCH = 20
+
+
+class SavedSearchStore:
+    def __init__(self, db_path=SAVED_SEARCHES_DB):
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS saved_searches ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, query TEXT NOT NULL, normalized TEXT NOT NULL UNIQUE,"
+            " model TEXT NOT NULL, embedding BLOB NOT NULL, threshold REAL NOT NULL, created REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS seen_jobs (job_id TEXT PRIMARY KEY);"
+            "CREATE TABLE IF NOT EXISTS alerts ("
+            " search_id INTEGER NOT NULL, job_id TEXT NOT NULL, score REAL NOT NULL, title TEXT, company TEXT,"
+            " link TEXT, created REAL NOT NULL, delivered REAL, PRIMARY KEY (search_id, job_id));"
+        )
+        self.db.commit()
+
+    # Save a query with its embedding; saving the same (normalized) query again updates it
+    def add(self, query, embedding, model, threshold=DEFAULT_THRESHOLD):
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            raise ValueError("Query embedding is all zeros")
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO saved_searches (query, normalized, model, embedding, threshold, created)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(normalized) DO UPDATE SET"
+                " query = excluded.query, model = excluded.model, embedding = excluded.embedding,"
+                " threshold = excluded.threshold",
+                (query, normalize_query(query), model, (vector / norm).tobytes(), float(threshold), time.time()),
+            )
+            self.db.commit()
+            return self.db.execute("SELECT id FROM saved_searches WHERE normalized = ?",
+                                   (normalize_query(query),)).fetchone()[0]
+
+    def remove(self, search_id):
+        with self.lock:
+            self.db.execute("DELETE FROM saved_searches WHERE id = ?", (search_id,))
+            self.db.execute("DELETE FROM alerts WHERE search_id = ?", (search_id,))
+            self.db.commit()
+
+    # [{"id", "query", "model", "threshold", "pending"}], oldest first; only the given
+    # search ids when search_ids is not None
+    def list(self, search_ids=None):
+        where = ""
+        if search_ids is not None:
+            search_ids = [int(search_id) for search_id in search_ids]
+            if not search_ids:
+                return []
+            where = f" WHERE s.id IN ({', '.join('?' * len(search_ids))})"
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT s.id, s.query, s.model, s.threshold,"
+                " (SELECT COUNT(*) FROM alerts a WHERE a.search_id = s.id AND a.delivered IS NULL)"
+                f" FROM saved_searches s{where} ORDER BY s.id",
+                search_ids or (),
+            ).fetchall()
+        return [{"id": row[0], "query": row[1], "model": row[2], "threshold": row[3], "pending": row[4]}
+                for row in rows]
+
+    # Saved searches as (ids, queries, (searches, dim) unit-length matrix, thresholds,
+    # skipped): skipped lists the queries embedded with another size than dim
+    def matrix(self, dim=None):
+        with self.lock:
+            rows = self.db.execute("SELECT id, query, embedding, threshold FROM saved_searches ORDER BY id").fetchall()
+        vectors = [np.frombuffer(row[2], dtype=np.float32) for row in rows]
+        keep = [i for i, vector in enumerate(vectors) if dim is None or vector.shape == (dim,)]
+        skipped = [row[1] for row, vector in zip(rows, vectors) if dim is not None and vector.shape != (dim,)]
+        ids = [rows[i][0] for i in keep]
+        queries = [rows[i][1] for i in keep]
+        thresholds = np.array([rows[i][3] for i in keep], dtype=np.float32)
+        matrix = np.stack([vectors[i] for i in keep]) if keep else np.empty((0, dim or 0), dtype=np.float32)
+        return ids, queries, matrix, thresholds, skipped
+
+    def has_seen_jobs(self):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM seen_jobs LIMIT 1").fetchone() is not None
+
+    # The ids in job_ids that no match run has seen yet, in the same order
+    def unseen(self, job_ids):
+        with self.lock:
+            seen = {row[0] for row in self.db.execute("SELECT job_id FROM seen_jobs")}
+        return [job_id for job_id in job_ids if str(job_id) not in seen]
+
+    def mark_seen(self, job_ids):
+        with self.lock:
+            self.db.executemany("INSERT OR IGNORE INTO seen_jobs (job_id) VALUES (?)",
+                                ((str(job_id),) for job_id in job_ids))
+            self.db.commit()
+
+    # alerts: (search_id, job_id, score, job) tuples; an alert already in the outbox is kept as is
+    def add_alerts(self, alerts):
+        now = time.time()
+        with self.lock:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO alerts (search_id, job_id, score, title, company, link, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((search_id, str(job_id), float(score), job.get("title", ""), job.get("company", ""),
+                  job.get("link", ""), now) for search_id, job_id, score, job in alerts),
+            )
+            self.db.commit()
+            return self.db.total_changes - before
+
+    # Undelivered alerts as {search query: [alert dicts, best score first]}
+    def pending_alerts(self):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT s.query, a.search_id, a.job_id, a.score, a.title, a.company, a.link"
+                " FROM alerts a JOIN saved_searches s ON s.id = a.search_id"
+                " WHERE a.delivered IS NULL ORDER BY a.search_id, a.score DESC"
+            ).fetchall()
+        digest = {}
+        for query, search_id, job_id, score, title, company, link in rows:
+            digest.setdefault(query, []).append({"search_id": search_id, "job_id": job_id, "score": score,
+                                                 "title": title, "company": company, "link": link})
+        return digest
+
+    # Mark the given alerts (dicts from pending_alerts) as delivered, so a match run that
+    # finishes in between does not lose its new alerts
+    def mark_delivered(self, alerts):
+        now = time.time()
+        with self.lock:
+            self.db.executemany("UPDATE alerts SET delivered = ? WHERE search_id = ? AND job_id = ?",
+                                ((now, alert["search_id"], alert["job_id"]) for alert in alerts))
+            self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+# Score every saved search against the given job rows with one matrix-matrix product per
+# block and return (search index, row, score) for the scores at or above each threshold,
+# at most max_per_search per search, best first. query_masks maps a search index to a
+# boolean mask over rows (jobs its exclusions rule out are False).
+def match_rows(query_matrix, thresholds, matrix, rows, query_masks=None, block_rows=MATCH_BLOCK_ROWS,
+               max_per_search=MAX_ALERTS_PER_SEARCH):
+    query_masks = query_masks or {}
+    rows = np.asarray(rows, dtype=np.int64)
+    hits = [[] for _ in range(len(query_matrix))]
+    for start in range(0, len(rows), block_rows):
+        block_index = rows[start:start + block_rows]
+        block = np.asarray(matrix[block_index], dtype=np.float32)
+        # (searches, dim) @ (dim, block) -> (searches, block)
+        scores = query_matrix @ block.T
+        for search, mask in query_masks.items():
+            scores[search, ~mask[start:start + block_rows]] = -np.inf
+        for search, column in zip(*np.nonzero(scores >= thresholds[:, None])):
+            hits[search].append((float(scores[search, column]), int(block_index[column])))
+    matches = []
+    for search, search_hits in enumerate(hits):
+        search_hits.sort(reverse=True)
+        matches.extend((search, row, score) for score, row in search_hits[:max_per_search])
+    return matches
+
+
+# Match every saved search against the jobs of store_dir that no earlier run has seen,
+# write the alerts to the outbox and mark those jobs as seen. Returns a summary dict.
+def run_alerts(store_dir, saved=None, max_per_search=MAX_ALERTS_PER_SEARCH):
+    from query_filters import QueryFilter
+    from vector_store import load_vector_store
+
+    saved = saved or SavedSearchStore()
+    engine = load_vector_store(store_dir)
+    if engine.compression is not None:
+        raise ValueError(f"{store_dir} is a compressed store; match against the full-precision store")
+    new_ids = saved.unseen(engine.job_ids)
+    summary = {"jobs": len(engine), "new_jobs": len(new_ids), "searches": 0, "alerts": 0, "baseline": False,
+               "skipped": []}
+    if not saved.has_seen_jobs():
+        # First run: the current catalogue is the baseline, only later postings alert
+        saved.mark_seen(engine.job_ids)
+        summary.update(new_jobs=0, baseline=True)
+        return summary
+    if not new_ids:
+        return summary
+
+    search_ids, queries, query_matrix, thresholds, skipped = saved.matrix(dim=engine.matrix.shape[1])
+    summary.update(searches=len(search_ids), skipped=skipped)
+    if search_ids:
+        rows = np.array([engine.row_of[job_id] for job_id in new_ids], dtype=np.int64)
+        new_jobs = [engine.jobs[row] for row in rows]
+        # Exclusions are evaluated over the new jobs only, in the same order as rows
+        query_filter = QueryFilter(new_jobs)
+        query_masks = {}
+        for search, query in enumerate(queries):
+            mask = query_filter.mask_for(query_filter.parse(query))
+            if mask is not None:
+                query_masks[search] = mask
+        matches = match_rows(query_matrix, thresholds, engine.matrix, rows, query_masks,
+                             max_per_search=max_per_search)
+        summary["alerts"] = saved.add_alerts(
+            (search_ids[search], engine.job_ids[row], score, engine.jobs[row]) for search, row, score in matches
+        )
+    saved.mark_seen(new_ids)
+    return summary
+
+
+def format_digest(digest):
+    lines = []
+    for query, alerts in digest.items():
+        lines.append(f"## {query} ({len(alerts)} new)")
+        for alert in alerts:
+            title = f"[{alert['title']}]({alert['link']})" if alert["link"] else alert["title"]
+            lines.append(f"- {title} - {alert['company']} (similarity {alert['score']:.2f})")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Saved AI searches and alerts for new job postings")
+    parser.add_argument("--db", default=SAVED_SEARCHES_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="save a query (embedded with the Together backend)")
+    add.add_argument("query")
+    add.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="minimum cosine similarity")
+    add.add_argument("--embedding-backend", default="together", help="together or local")
+    commands.add_parser("list", help="list saved searches and their pending alerts")
+    remove = commands.add_parser("remove", help="delete a saved search and its alerts")
+    remove.add_argument("search_id", type=int)
+    match = commands.add_parser("match", help="alert on the jobs added to the store since the last run")
+    match.add_argument("store_dir", nargs="?", default="job_vectors_store")
+    match.add_argument("--max-per-search", type=int, default=MAX_ALERTS_PER_SEARCH)
+    digest = commands.add_parser("digest", help="write the undelivered alerts and mark them delivered")
+    digest.add_argument("--output", default=None, help="markdown file (default: stdout)")
+    digest.add_argument("--keep", action="store_true", help="do not mark the alerts as delivered")
+    args = parser.parse_args()
+
+    saved = SavedSearchStore(args.db)
+    if args.command == "add":
+        from embedding_providers import get_embedding_provider
+
+        if args.embedding_backend == "together":
+            from explanation_cache import read_together_api_key
+            from together import Together
+
+            provider = get_embedding_provider("together", client=Together(api_key=read_together_api_key()))
+        else:
+            provider = get_embedding_provider(args.embedding_backend)
+        search_id = saved.add(args.query, provider.embed_query(normalize_query(args.query)), provider.name,
+                              threshold=args.threshold)
+        print(f"Saved search {search_id}: {args.query!r} (threshold {args.threshold})")
+    elif args.command == "list":
+        for search in saved.list():
+            print(f"{search['id']:>4}  {search['threshold']:.2f}  {search['pending']:>3} pending  {search['query']}")
+    elif args.command == "remove":
+        saved.remove(args.search_id)
+    elif args.command == "match":
+        start = time.perf_counter()
+        summary = run_alerts(args.store_dir, saved, max_per_search=args.max_per_search)
+        if summary["skipped"]:
+            print(f"Skipping {len(summary['skipped'])} saved searches with a different embedding size: "
+                  f"{summary['skipped']}")
+        if summary["baseline"]:
+            print(f"First run: {summary['jobs']} existing jobs marked as seen, no alerts")
+        else:
+            print(f"{summary['new_jobs']} new jobs x {summary['searches']} saved searches: "
+                  f"{summary['alerts']} new alerts in {time.perf_counter() - start:.2f}s")
+    elif args.command == "digest":
+        pending = saved.pending_alerts()
+        text = format_digest(pending)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"{sum(len(alerts) for alerts in pending.values())} alerts written to {args.output}")
+        else:
+            print(text or "No new alerts.")
+        if not args.keep:
+            saved.mark_delivered([alert for alerts in pending.values() for alert in alerts])
+    saved.close()
+
+
+if __name__ == "__main__":
+    main()
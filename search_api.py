@@ -0,0 +1,304 @@
+# search_api.py
+# Headless HTTP API for AI Search over the same job store and vector store as the app.
+#
+#   python search_api.py --port 8080                        # real data and backends
+#   python search_api.py --stub --synthetic 100000           # offline: stub embeddings/LLM, random jobs
+#
+#   GET /search?q=python+developer&top_n=50
+#   GET /explain?q=python+developer&top_n=5
+#   GET /health
+#   GET /stats
+#   GET /metrics                                           # Prometheus text (with --trace)
+#
+# Built on aiohttp, which is already installed with together. Identical queries that
+# are in flight at the same time share one computation. Embedding, scoring and LLM
+# calls run in thread pools, so the event loop only parses requests and writes
+# responses; numpy releases the GIL in the matrix-vector product, so several searches
+# score in parallel. Explanations have their own pool so slow LLM calls never hold up
+# searches.
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from embedding_cache import QueryEmbeddingCache, normalize_query
+from explanations import EXPLAINED_JOBS, FALLBACK_MODEL, PRIMARY_MODEL
+from query_filters import QueryFilter, describe_rule
+from tracing import tracer
+
+DEFAULT_TOP_N = 50
+MAX_TOP_N = 200
+DEFAULT_EXPLAINED = EXPLAINED_JOBS
+MAX_EXPLAINED = 20
+
+
+def job_summary(job_id, score, job):
+    return {
+        "id": str(job_id),
+        "score": round(float(score), 4),
+        "title": job.get("title", ""),
+        "company": job.get("company", ""),
+        "location": job.get("location", ""),
+        "type": job.get("type", ""),
+        "date": job.get("date", ""),
+        "link": job.get("link", ""),
+        "skills": list(job.get("skills") or []),
+    }
+
+
+class SearchService:
+    def __init__(self, engine, provider, explainer=None, query_filter=None, embedding_cache=None, reranker=None,
+                 max_workers=4, explain_workers=8):
+        self.engine = engine
+        self.provider = provider
+        self.explainer = explainer
+        self.query_filter = query_filter
+        self.embedding_cache = embedding_cache
+        self.reranker = reranker
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+        self.explain_executor = ThreadPoolExecutor(max_workers=explain_workers, thread_name_prefix="explain")
+        self._in_flight = {}
+        self.stats = {"requests": 0, "computed": 0, "coalesced": 0}
+
+    # Run fn in executor, or join the identical call that is already running
+    async def _coalesce(self, key, executor, fn, *args):
+        self.stats["requests"] += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.stats["computed"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        # A client that disconnects must not cancel the computation the others wait on
+        return await asyncio.shield(future)
+
+    def _embed(self, query):
+        with tracer.span("embedding"):
+            if self.embedding_cache is None:
+                return self.provider.embed_query(normalize_query(query))
+            return self.embedding_cache.get_or_compute(query, self.provider.name, self.provider.embed_query)
+
+    # Ranked (job_id, score, job) results and the parsed filter rules, as the app ranks them
+    def search_results(self, query, top_n):
+        with tracer.span("query_filter"):
+            rules = self.query_filter.parse(query) if self.query_filter is not None else []
+            mask = self.query_filter.mask_for(rules) if rules else None
+        query_embedding = self._embed(query)
+        with tracer.span("search"):
+            results = self.engine.search(query_embedding, top_n=top_n, mask=mask, query_text=query)
+        if self.reranker is not None:
+            with tracer.span("rerank"):
+                results, _ = self.reranker.rerank(query, results)
+        return results, rules
+
+    def _search(self, query, top_n):
+        results, rules = self.search_results(query, top_n)
+        return {
+            "query": query,
+            "filters": [describe_rule(rule) for rule in rules],
+            "results": [job_summary(*result) for result in results],
+        }
+
+    # Like the app: rank the usual top results, then explain the first top_n
+    def _explain(self, query, top_n):
+        results, _ = self.search_results(query, max(top_n, DEFAULT_TOP_N))
+        results = results[:top_n]
+        futures = self.explainer.submit_job_explanations(results, query)
+        try:
+            overall = "".join(self.explainer.stream_overall_explanation(results, query)).strip()
+        except Exception:
+            overall = ""
+        job_explanations = {}
+        for future in as_completed(futures):
+            if future.exception() is None:
+                job_explanations.update(future.result())
+        return {
+            "query": query,
+            "overall_explanation": overall or "No overall explanation available.",
+            "job_explanations": job_explanations,
+            "results": [job_summary(*result) for result in results],
+        }
+
+    async def search(self, query, top_n=DEFAULT_TOP_N):
+        return await self._coalesce(("search", normalize_query(query), top_n), self.executor, self._search,
+                                    query, top_n)
+
+    async def explain(self, query, top_n=DEFAULT_EXPLAINED):
+        if self.explainer is None:
+            raise RuntimeError("Explanations are not configured")
+        return await self._coalesce(("explain", normalize_query(query), top_n), self.explain_executor,
+                                    self._explain, query, top_n)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.explain_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_app(service):
+    from aiohttp import web
+
+    def query_params(request, default_top_n, max_top_n):
+        query = request.query.get("q", "").strip()
+        if not query:
+            raise web.HTTPBadRequest(text="Missing query parameter q")
+        try:
+            top_n = int(request.query.get("top_n", default_top_n))
+        except ValueError:
+            raise web.HTTPBadRequest(text="top_n must be an integer") from None
+        return query, max(1, min(top_n, max_top_n))
+
+    async def search(request):
+        query, top_n = query_params(request, DEFAULT_TOP_N, MAX_TOP_N)
+        return web.json_response(await service.search(query, top_n))
+
+    async def explain(request):
+        query, top_n = query_params(request, DEFAULT_EXPLAINED, MAX_EXPLAINED)
+        if service.explainer is None:
+            raise web.HTTPNotImplemented(text="Explanations are not configured")
+        return web.json_response(await service.explain(query, top_n))
+
+    async def health(request):
+        return web.json_response({"status": "ok", "jobs": len(service.engine)})
+
+    async def stats(request):
+        body = dict(service.stats, in_flight=len(service._in_flight), stages=tracer.stage_stats())
+        if service.embedding_cache is not None:
+            body["embedding_cache"] = service.embedding_cache.stats
+        return web.json_response(body)
+
+    async def metrics(request):
+        return web.Response(text=tracer.prometheus_text(), content_type="text/plain")
+
+    async def close(app):
+        service.close()
+
+    app = web.Application()
+    app.router.add_get("/search", search)
+    app.router.add_get("/explain", explain)
+    app.router.add_get("/health", health)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/metrics", metrics)
+    app.on_cleanup.append(close)
+    return app
+
+
+_TITLES = ["Data Engineer", "Backend Developer", "Frontend Developer", "Machine Learning Engineer",
+           "DevOps Engineer", "Data Analyst", "Mobile Developer", "Security Engineer", "QA Engineer"]
+_SKILLS = ["Python", "SQL", "Kafka", "Terraform", "AWS", "React", "TypeScript", "Go", "Kubernetes", "Spark",
+           "PyTorch", "Docker", "Java", "Flutter", "Airflow", "Tableau"]
+_LOCATIONS = ["Madrid", "Barcelona", "Remote", "Berlin", "London", "Lisbon"]
+_TYPES = ["Full-time", "Part-time", "Freelance", "Internship"]
+
+
+# Random clustered vectors and jobs, for offline runs without the data files
+def synthetic_engine(n_jobs, dim=1024, n_clusters=200, seed=0):
+    from bm25_index import BM25Index
+    from job_store import normalize_job
+    from search_engine import JobSearchEngine, normalize_rows
+
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, n_clusters, n_jobs)
+    matrix = normalize_rows(centers[labels] + 0.5 * rng.standard_normal((n_jobs, dim), dtype=np.float32))
+    jobs = []
+    for row in range(n_jobs):
+        skills = rng.choice(_SKILLS, 3, replace=False).tolist()
+        jobs.append(normalize_job({
+            "id": str(row),
+            "title": _TITLES[labels[row] % len(_TITLES)],
+            "company": f"Company {labels[row]}",
+            "location": _LOCATIONS[row % len(_LOCATIONS)],
+            "type": _TYPES[row % len(_TYPES)],
+            "description": f"We are looking for someone with {', '.join(skills)} and {1 + row % 8} years of experience.",
+            "skills": skills,
+        }))
+    engine = JobSearchEngine([job.id for job in jobs], matrix, jobs, normalized=True)
+    engine.lexical = BM25Index.from_jobs(jobs)
+    return engine
+
+
+# Build the service from command-line style options (shared with benchmarks/load_test.py)
+def build_service(stub=False, synthetic=None, store="job_vectors_store", compressed_store=None,
+                  data="joined_data_standar.json", embedding_backend="together", max_workers=4,
+                  embedding_quantize=None, rerank=None,
+                  primary_model=PRIMARY_MODEL, fallback_model=FALLBACK_MODEL,
+                  stub_embedding_delay=0.0, stub_llm_delay=0.5):
+    from explanations import ExplanationGenerator
+
+    if synthetic:
+        engine = synthetic_engine(synthetic)
+    else:
+        from dedup import deduplicated_path
+        from job_store import load_job_store
+        from vector_store import open_search_engine
+
+        job_store = load_job_store(deduplicated_path(data)) if os.path.exists(data) else None
+        engine = open_search_engine(store, job_store=job_store, compressed_dir=compressed_store)
+
+    if stub:
+        from embedding_providers import StubEmbeddingProvider
+        from stub_llm import StubChatClient
+
+        dim = engine.compression.input_dim if engine.compression is not None else engine.matrix.shape[1]
+        provider = StubEmbeddingProvider(dim=dim, delay=stub_embedding_delay)
+        client = StubChatClient(delay=stub_llm_delay)
+        embedding_cache = QueryEmbeddingCache()
+        explanation_cache = None
+    else:
+        from embedding_cache import QUERY_CACHE_DB
+        from embedding_providers import get_embedding_provider
+        from explanation_cache import EXPLANATION_CACHE_DB, ExplanationCache, read_together_api_key
+        from together import Together
+
+        client = Together(api_key=read_together_api_key())
+        if embedding_backend == "together":
+            provider = get_embedding_provider("together", client=client)
+        else:
+            provider = get_embedding_provider(embedding_backend, quantize=embedding_quantize)
+        embedding_cache = QueryEmbeddingCache(db_path=QUERY_CACHE_DB)
+        explanation_cache = ExplanationCache(db_path=EXPLANATION_CACHE_DB)
+
+    reranker = None
+    if rerank:
+        from reranker import reranker_from_settings
+
+        reranker = reranker_from_settings(rerank)
+    explainer = ExplanationGenerator(client, primary_model, fallback_model, cache=explanation_cache)
+    return SearchService(engine, provider, explainer=explainer, query_filter=QueryFilter(engine.jobs),
+                         embedding_cache=embedding_cache, reranker=reranker, max_workers=max_workers)
+
+
+def main():
+    from aiohttp import web
+
+    parser = argparse.ArgumentParser(description="Serve AI Search over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--store", default="job_vectors_store")
+    parser.add_argument("--compressed-store", default="job_vectors_store_compressed")
+    parser.add_argument("--data", default="joined_data_standar.json", help="job data, shared with the store")
+    parser.add_argument("--embedding-backend", default="together", help="together or local")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="search threads")
+    parser.add_argument("--stub", action="store_true", help="stub embedding and LLM backends (offline)")
+    parser.add_argument("--synthetic", type=int, default=None, help="serve N random jobs instead of the store")
+    parser.add_argument("--stub-embedding-delay", type=float, default=0.0, help="seconds per stub embedding")
+    parser.add_argument("--stub-llm-delay", type=float, default=0.5, help="seconds per stub LLM call")
+    parser.add_argument("--trace", action="store_true", help="per-stage latency histograms on /metrics")
+    args = parser.parse_args()
+    if args.trace:
+        tracer.enabled = True
+
+    service = build_service(stub=args.stub, synthetic=args.synthetic, store=args.store,
+                            compressed_store=args.compressed_store, data=args.data,
+                            embedding_backend=args.embedding_backend, max_workers=args.workers,
+                            stub_embedding_delay=args.stub_embedding_delay, stub_llm_delay=args.stub_llm_delay)
+    print(f"Serving {len(service.engine)} jobs on http://{args.host}:{args.port}")
+    web.run_app(create_app(service), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# search_engine.py
+import numpy as np
+
+EMBEDDING_DIM = 1024
+# Rows upcast per block when the matrix is stored as float16 or int8
+SCORE_CHUNK_ROWS = 65536
+# Share of the BM25 score in hybrid ranking: (1 - w) * cosine + w * bm25 / max bm25
+LEXICAL_WEIGHT = 0.3
+# With an ANN index, the best top_n * this many BM25 rows join the IVF candidates
+LEXICAL_CANDIDATES_FACTOR = 4
+
+
+# Normalize rows to unit length so cosine similarity becomes a plain dot product
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+# Indices of the top_n highest scores, best first, without sorting the whole array
+def top_n_indices(scores, top_n):
+    if top_n <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_n >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, top_n - 1)[:top_n]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class JobSearchEngine:
+    """Holds every job embedding in one contiguous, pre-normalized float32 matrix.
+
+    A search is a single matrix-vector product followed by a partial selection of
+    the best rows, and returns the same (job_id, similarity, job) tuples as the old
+    per-job loop in get_top_similar_jobs. A float16 matrix is upcast block by block
+    while scoring, and so is an int8 matrix from a compressed store.
+
+    When a BM25 index is attached (self.lexical, see bm25_index.py) and the query text
+    is passed, cosine and BM25 scores are fused over the same candidate rows.
+    """
+
+    def __init__(self, job_ids, matrix, jobs, normalized=False):
+        self.job_ids = list(job_ids)
+        self.row_of = {job_id: row for row, job_id in enumerate(self.job_ids)}
+        self.jobs = jobs
+        self.skipped_ids = []
+        # Optional approximate index (see ann_index.IVFIndex); None means brute force
+        self.index = None
+        # Optional BM25 index (see bm25_index.BM25Index); None means semantic ranking only
+        self.lexical = None
+        # Optional projection/quantization of a compressed store (see compression.py),
+        # applied to every query; None means the matrix holds the full embeddings
+        self.compression = None
+        if normalized:
+            # float16, float32 and (compressed) int8 matrices, e.g. a np.memmap, are used as-is
+            if matrix.dtype not in (np.float16, np.float32, np.int8):
+                matrix = matrix.astype(np.float32)
+            self.matrix = matrix
+        else:
+            self.matrix = normalize_rows(np.array(matrix, dtype=np.float32))
+
+    @classmethod
+    def from_job_vectors(cls, job_vectors, dim=EMBEDDING_DIM):
+        # job_vectors has the job_vectors.pkl layout: {job_id: {"embedding": [...], "data": job}}
+        job_ids = []
+        jobs = []
+        skipped_ids = []
+        matrix = np.empty((len(job_vectors), dim), dtype=np.float32)
+        row = 0
+        for job_id, job_data in job_vectors.items():
+            embedding = np.asarray(job_data["embedding"], dtype=np.float32)
+            if embedding.shape != (dim,):
+                skipped_ids.append(job_id)
+                continue
+            matrix[row] = embedding
+            job_ids.append(job_id)
+            jobs.append(job_data["data"])
+            row += 1
+        engine = cls(job_ids, normalize_rows(matrix[:row]), jobs, normalized=True)
+        engine.skipped_ids = skipped_ids
+        return engine
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def prepare_query(self, query_embedding):
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        dim = self.matrix.shape[1] if self.compression is None else self.compression.input_dim
+        if query.shape != (dim,):
+            raise ValueError(f"Query embedding has shape {query.shape}, expected ({dim},)")
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        if self.compression is not None:
+            query = self.compression.transform_query(query)
+        return query
+
+    # Cosine similarity of the query against every job, in row order
+    def score(self, query_embedding):
+        return self._score(self.prepare_query(query_embedding))
+
+    def _score(self, query):
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ query
+        scores = np.empty(self.matrix.shape[0], dtype=np.float32)
+        for start in range(0, self.matrix.shape[0], SCORE_CHUNK_ROWS):
+            block = self.matrix[start:start + SCORE_CHUNK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    # Cosine similarity of the query against the given rows only
+    def _score_rows(self, rows, query):
+        return np.asarray(self.matrix[rows], dtype=np.float32) @ query
+
+    # True when a mask left fewer IVF candidates than results it still allows
+    @staticmethod
+    def _mask_starved(n_candidates, top_n, mask):
+        return mask is not None and n_candidates < min(top_n, int(np.count_nonzero(mask)))
+
+    # nprobe overrides the index default; exact=True always scans every job.
+    # mask is an optional boolean array over rows: jobs where it is False are never returned.
+    # query_text enables hybrid ranking when a BM25 index is attached; the returned score is
+    # then the fused score.
+    def search(self, query_embedding, top_n=50, nprobe=None, exact=False, mask=None, query_text=None,
+               lexical_weight=LEXICAL_WEIGHT):
+        if self.lexical is not None and query_text and lexical_weight > 0:
+            lexical_scores = self.lexical.score(query_text)
+            if lexical_scores is not None:
+                return self._hybrid_search(self.prepare_query(query_embedding), lexical_scores, top_n, nprobe,
+                                           exact, mask, lexical_weight)
+        if self.index is None or exact:
+            scores = self.score(query_embedding)
+            if mask is not None:
+                scores[~mask] = -np.inf
+                top_n = min(top_n, int(np.count_nonzero(mask)))
+            rows = top_n_indices(scores, top_n)
+            row_scores = scores[rows]
+        else:
+            query = self.prepare_query(query_embedding)
+            rows, row_scores = self.index.search(self.matrix, query, top_n, nprobe, mask=mask)
+            if self._mask_starved(len(rows), top_n, mask):
+                # The probed lists hold fewer allowed jobs than requested: scan every allowed job
+                rows = np.flatnonzero(mask)
+                scores = self._score_rows(rows, query)
+                best = top_n_indices(scores, top_n)
+                rows, row_scores = rows[best], scores[best]
+        return [
+            (self.job_ids[i], float(score), self.jobs[i])
+            for i, score in zip(rows, row_scores)
+        ]
+
+    def _hybrid_search(self, query, lexical_scores, top_n, nprobe, exact, mask, lexical_weight):
+        if self.index is None or exact:
+            rows = np.arange(len(self.job_ids)) if mask is None else np.flatnonzero(mask)
+            cosine = self._score(query)[rows]
+        else:
+            # IVF candidates plus the best lexical matches, which may sit in unprobed lists
+            lexical_rows = top_n_indices(lexical_scores, top_n * LEXICAL_CANDIDATES_FACTOR)
+            lexical_rows = lexical_rows[lexical_scores[lexical_rows] > 0]
+            rows = np.union1d(self.index.candidate_rows(query, nprobe), lexical_rows)
+            if mask is not None:
+                rows = rows[mask[rows]]
+                if self._mask_starved(len(rows), top_n, mask):
+                    rows = np.flatnonzero(mask)
+            cosine = self._score_rows(rows, query)
+        lexical = lexical_scores[rows]
+        best_lexical = lexical.max() if lexical.size else 0.0
+        if best_lexical > 0:
+            scores = (1 - lexical_weight) * cosine + lexical_weight * (lexical / best_lexical)
+        else:
+            scores = cosine
+        best = top_n_indices(scores, top_n)
+        return [
+            (self.job_ids[i], float(score), self.jobs[i])
+            for i, score in zip(rows[best], scores[best])
+        ]
@@ -0,0 +1,42 @@
+# stub_llm.py
+# Offline stand-in for the Together client's chat.completions API, used by
+# search_api.py --stub and benchmarks/load_test.py. It answers the prompts in prompts.py
+# with canned text after a fixed delay, streamed or not, so explanations can be
+# exercised and load-tested without network access or API keys.
+import json
+import re
+import time
+from types import SimpleNamespace
+
+_JOB_ID_RE = re.compile(r'"id": "?([^",\n]+)"?')
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class StubChatClient:
+    def __init__(self, delay=0.5, token_delay=0.005):
+        # Seconds before the first token, and between streamed tokens
+        self.delay = delay
+        self.token_delay = token_delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _answer(self, prompt):
+        job_ids = _JOB_ID_RE.findall(prompt)
+        if "JSON object with job IDs as keys" in prompt:
+            return json.dumps({job_id: f"Stub explanation for job {job_id}." for job_id in job_ids})
+        return f"Stub overview of {len(job_ids)} jobs that match the query."
+
+    def _stream(self, text):
+        for word in text.split(" "):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield _chunk(word + " ")
+
+    def _create(self, model, messages, max_tokens=None, temperature=None, stream=False):
+        time.sleep(self.delay)
+        text = self._answer(messages[-1]["content"])
+        if stream:
+            return self._stream(text)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
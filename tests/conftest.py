@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live in the repository root, like the benchmarks
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
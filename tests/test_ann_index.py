@@ -0,0 +1,57 @@
+import numpy as np
+
+from ann_index import IVFIndex
+from search_engine import normalize_rows, top_n_indices
+
+
+def clustered_matrix(n_rows=3000, dim=32, n_clusters=30, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim))
+    rows = centers[rng.integers(0, n_clusters, n_rows)] + 0.3 * rng.standard_normal((n_rows, dim))
+    return normalize_rows(rows.astype(np.float32))
+
+
+def test_lists_partition_the_rows():
+    matrix = clustered_matrix()
+    index = IVFIndex.build(matrix, n_lists=40)
+    assert index.n_lists == 40
+    assert index.offsets[-1] == len(matrix)
+    assert np.array_equal(np.sort(index.order), np.arange(len(matrix)))
+
+
+def test_probing_every_list_is_exact():
+    matrix = clustered_matrix()
+    index = IVFIndex.build(matrix, n_lists=40)
+    query = matrix[7]
+    rows, scores = index.search(matrix, query, top_n=10, nprobe=index.n_lists)
+    assert np.array_equal(rows, top_n_indices(matrix @ query, 10))
+    assert np.allclose(scores, (matrix @ query)[rows])
+
+
+def test_recall_with_few_probes():
+    matrix = clustered_matrix()
+    index = IVFIndex.build(matrix, n_lists=40, nprobe=8)
+    hits = 0
+    for query in matrix[:50]:
+        rows, _ = index.search(matrix, query, top_n=10)
+        hits += len(np.intersect1d(rows, top_n_indices(matrix @ query, 10)))
+    assert hits / 500 >= 0.9
+
+
+def test_mask_drops_rows():
+    matrix = clustered_matrix()
+    index = IVFIndex.build(matrix, n_lists=40)
+    mask = np.ones(len(matrix), dtype=bool)
+    mask[::2] = False
+    rows, _ = index.search(matrix, matrix[1], top_n=20, nprobe=index.n_lists, mask=mask)
+    assert len(rows) == 20 and np.all(rows % 2 == 1)
+
+
+def test_save_and_load(tmp_path):
+    matrix = clustered_matrix(n_rows=500)
+    index = IVFIndex.build(matrix, n_lists=10, nprobe=3, digest="abc")
+    path = str(tmp_path / "ivf_index.npz")
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert (loaded.nprobe, loaded.digest) == (3, "abc")
+    assert np.array_equal(loaded.order, index.order) and np.array_equal(loaded.offsets, index.offsets)
@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+
+from dedup import MinHasher, find_duplicates, shingle_hashes, write_deduplicated
+from json_stream import iter_records
+
+
+def description(seed, words=100):
+    rng = np.random.default_rng(seed)
+    return " ".join(f"word{n}" for n in rng.integers(0, 5000, words))
+
+
+def near_copy(text, position=50):
+    words = text.split()
+    words[position] = "changed"
+    return " ".join(words)
+
+
+def write_jobs(path, jobs):
+    path.write_text(json.dumps(jobs), encoding="utf-8")
+    return str(path)
+
+
+BACKEND = description(1)
+DATA = description(2)
+JOBS = [
+    {"id": "a1", "title": "Senior Backend Engineer", "description": BACKEND, "source": "linkedin",
+     "link": "https://linkedin/a1", "skills": ["python"]},
+    # Same posting on another board, with more skills: the canonical record
+    {"id": "b7", "title": "Senior Backend Engineer", "description": near_copy(BACKEND), "source": "indeed",
+     "link": "https://indeed/b7", "skills": ["python", "sql"]},
+    {"id": "d1", "title": "Data Scientist", "description": DATA, "source": "linkedin", "link": "https://linkedin/d1"},
+    # Same boilerplate under an unrelated title is not a duplicate
+    {"id": "m1", "title": "Marketing Manager", "description": DATA, "source": "indeed", "link": "https://indeed/m1"},
+    {"id": "e1", "title": "", "description": "", "source": "linkedin", "link": ""},
+    {"id": "e2", "title": "", "description": "", "source": "indeed", "link": ""},
+]
+
+
+def clusters_by_id(result):
+    return {result.ids[canonical]: sorted(result.ids[row] for row in rows)
+            for canonical, rows in result.clusters().items()}
+
+
+def test_minhash_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    a = shingle_hashes(BACKEND)
+    b = shingle_hashes(near_copy(BACKEND))
+    c = shingle_hashes(DATA)
+    agreement = np.mean(hasher.signature(a) == hasher.signature(b))
+    true_jaccard = len(np.intersect1d(a, b)) / len(np.union1d(a, b))
+    assert abs(agreement - true_jaccard) < 0.1
+    assert np.mean(hasher.signature(a) == hasher.signature(c)) < 0.1
+    assert np.array_equal(hasher.signature(a), hasher.signature(a[::-1]))
+
+
+def test_clusters_and_canonical(tmp_path):
+    result = find_duplicates(write_jobs(tmp_path / "jobs.json", JOBS))
+    # Only the cross-board posting is merged, into its most complete record
+    assert clusters_by_id(result) == {"b7": ["a1"]}
+    report = result.report()
+    assert report["input_jobs"] == 6
+    assert report["output_jobs"] == 5
+    assert report["cross_source_clusters"] == 1
+
+
+def test_repeated_id_is_a_duplicate(tmp_path):
+    jobs = JOBS[:3] + [dict(JOBS[2], description=DATA + " updated")]
+    result = find_duplicates(write_jobs(tmp_path / "jobs.json", jobs))
+    assert sorted(clusters_by_id(result)) == ["b7", "d1"]
+
+
+def test_embedding_check_rejects_distant_vectors(tmp_path):
+    path = write_jobs(tmp_path / "jobs.json", JOBS)
+    vectors = (["a1", "b7"], np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32))
+    result = find_duplicates(path, vectors=vectors)
+    assert clusters_by_id(result) == {}
+    assert result.report()["embedding_checked_pairs"] == 1
+
+
+def test_write_deduplicated_lists_alternates_once(tmp_path):
+    jobs = JOBS + [
+        # The same indeed row scraped twice, and the canonical record re-posted under
+        # its own link: neither adds an alternate
+        dict(JOBS[0]),
+        dict(JOBS[0], id="a2", link="https://indeed/b7"),
+    ]
+    input_path = write_jobs(tmp_path / "jobs.json", jobs)
+    result = find_duplicates(input_path)
+    for output in ("dedup.json", "dedup.jsonl"):
+        output_path = str(tmp_path / output)
+        written = write_deduplicated(input_path, output_path, result)
+        records = list(iter_records(output_path))
+        assert written == len(records) == 5
+        canonical = next(record for record in records if record["id"] == "b7")
+        assert canonical["alternates"] == [{"id": "a1", "source": "linkedin", "link": "https://linkedin/a1"}]
+        assert [record["id"] for record in records] == ["b7", "d1", "m1", "e1", "e2"]
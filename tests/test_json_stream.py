@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from json_stream import iter_json_array, iter_json_lines, iter_records
+
+RECORDS = [
+    {"id": 1, "title": "Data \"Engineer\"", "description": "Line one\nline two\tand a \\ backslash"},
+    {"id": 2, "title": "Ingeniero de datos", "description": "Años de experiencia: 3 – 5 \U0001F680"},
+    {"id": 3, "salary": 12345.678, "remote": True, "skills": [], "company": None},
+    1234567890,
+    "a string element with ] and , inside",
+    [],
+]
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 2, 3, 7, 64, 1 << 20])
+def test_array_across_buffer_boundaries(tmp_path, chunk_chars):
+    path = write(tmp_path / "jobs.json", json.dumps(RECORDS, indent=2, ensure_ascii=False))
+    assert list(iter_json_array(path, chunk_chars=chunk_chars)) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 4, 1 << 20])
+def test_array_with_escaped_unicode(tmp_path, chunk_chars):
+    path = write(tmp_path / "jobs.json", json.dumps(RECORDS))
+    assert list(iter_json_array(path, chunk_chars=chunk_chars)) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 3, 1 << 20])
+def test_number_cut_at_end_of_buffer(tmp_path, chunk_chars):
+    # No whitespace after the last number, so it ends exactly where a read can stop
+    path = write(tmp_path / "numbers.json", "[1,22,333,4444,55555]")
+    assert list(iter_json_array(path, chunk_chars=chunk_chars)) == [1, 22, 333, 4444, 55555]
+
+
+@pytest.mark.parametrize("text", ["[]", "  \n [ ] ", "\n\n[\n]\n"])
+def test_empty_array(tmp_path, text):
+    assert list(iter_json_array(write(tmp_path / "empty.json", text), chunk_chars=1)) == []
+
+
+def test_not_an_array(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path / "object.json", '{"id": 1}')))
+
+
+def test_truncated_array(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path / "truncated.json", '[{"id": 1}, {"id": 2}'), chunk_chars=4))
+
+
+def test_truncated_element(tmp_path):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(write(tmp_path / "truncated.json", '[{"id": 1}, {"id": '), chunk_chars=4))
+
+
+def test_json_lines_skips_blank_lines(tmp_path):
+    text = "\n".join(json.dumps(record, ensure_ascii=False) for record in RECORDS[:3])
+    path = write(tmp_path / "jobs.jsonl", "\n" + text.replace("\n", "\n\n  \n") + "\n")
+    assert list(iter_json_lines(path)) == RECORDS[:3]
+
+
+def test_iter_records_picks_reader_from_extension(tmp_path):
+    lines = "".join(json.dumps(record) + "\n" for record in RECORDS[:3])
+    assert list(iter_records(write(tmp_path / "jobs.jsonl", lines))) == RECORDS[:3]
+    assert list(iter_records(write(tmp_path / "jobs.ndjson", lines))) == RECORDS[:3]
+    assert list(iter_records(write(tmp_path / "jobs.json", json.dumps(RECORDS[:3])))) == RECORDS[:3]
@@ -0,0 +1,26 @@
+from query_filters import PatternMatcher, token_text
+
+
+def test_overlapping_patterns():
+    matcher = PatternMatcher(["he", "she", "his", "hers"])
+    assert matcher.find("ushers") == []
+    assert matcher.find("she said hers and his") == ["she", "hers", "his"]
+
+
+def test_whole_words_only():
+    matcher = PatternMatcher(["intern", "in uk", "java"])
+    assert matcher.find("international sales in milwaukee") == []
+    assert matcher.find("javascript developer") == []
+    assert matcher.find("not intern, java only") == ["intern", "java"]
+    assert matcher.find("remote in uk") == ["in uk"]
+
+
+def test_suffix_matches_through_failure_links():
+    matcher = PatternMatcher(["machine learning", "learning"])
+    assert matcher.find("machine learning engineer") == ["machine learning", "learning"]
+    assert matcher.find("deep learning") == ["learning"]
+
+
+def test_token_text():
+    assert token_text("Data-Science Intern") == " data science intern "
+    assert token_text(None) == "  "
@@ -0,0 +1,231 @@
+# tracing.py
+# Per-stage latency tracing for the search flow.
+#
+#   with tracer.span("embedding"):
+#       ...
+#
+# Every finished span feeds a rolling latency histogram per stage (p50/p95/p99, exported
+# in Prometheus text format), and is also appended to the current request's trace when
+# one was started with start_trace(), for the debug panel. Work handed to a thread pool
+# only reaches that trace when submitted with submit_traced(). When tracing is off, span()
+# returns a shared no-op context manager, so an instrumented stage costs one attribute
+# check.
+#
+# Tracing is off by default; the app turns it on with [debug] tracing = true in
+# secrets.toml, search_api.py with --trace, anything else with JOB_PORTAL_TRACING=1.
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+HISTOGRAM_WINDOW = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_NAME = "job_portal_stage_seconds"
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+# Spans open in this thread/task, so spans of concurrent workers nest independently
+_span_depth = contextvars.ContextVar("span_depth", default=0)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+# Nearest-rank percentile (pct from 0 to 100) of a non-empty sequence; shared with the
+# benchmarks. Pass is_sorted=True when the values are already in ascending order.
+def percentile(values, pct, is_sorted=False):
+    ordered = values if is_sorted else sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class RollingHistogram:
+    """Last `window` durations of one stage, plus all-time count and sum."""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def quantiles(self, quantiles=QUANTILES):
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in quantiles}
+        return {q: percentile(ordered, q * 100, is_sorted=True) for q in quantiles}
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start", "depth", "trace", "token")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current_trace.get()
+        self.depth = _span_depth.get()
+        self.token = _span_depth.set(self.depth + 1)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self.start
+        _span_depth.reset(self.token)
+        self.tracer.record(self.name, seconds)
+        if self.trace is not None:
+            self.trace.add(self.name, seconds, self.depth, exc_type is not None)
+        return False
+
+
+class Trace:
+    """Spans of one request (one search), in the order they finished."""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.start = None
+        self.end = None
+        # Profiler output, when the request was profiled
+        self.profile = None
+
+    def add(self, name, seconds, depth, failed=False):
+        end = time.perf_counter()
+        self.spans.append((name, seconds, depth, failed))
+        self.start = end - seconds if self.start is None else min(self.start, end - seconds)
+        self.end = end if self.end is None else max(self.end, end)
+
+    # From the start of the first span to the end of the last one; spans of worker
+    # threads overlap the others, so durations are not summed
+    def total(self):
+        return self.end - self.start if self.spans else 0.0
+
+
+class Tracer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    # A duration measured by hand, where a with-block does not fit (e.g. time to first
+    # token inside a generator); goes to the histogram and to the current trace
+    def timing(self, name, seconds):
+        if not self.enabled:
+            return
+        self.record(name, seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, seconds, _span_depth.get())
+
+    def record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, RollingHistogram())
+        histogram.add(seconds)
+
+    # {stage: {"count", "mean", "p50", "p95", "p99"}} in seconds
+    def stage_stats(self):
+        stats = {}
+        for name, histogram in sorted(self.histograms.items()):
+            quantiles = histogram.quantiles()
+            stats[name] = {
+                "count": histogram.count,
+                "mean": histogram.total / histogram.count if histogram.count else 0.0,
+                **{f"p{int(q * 100)}": value for q, value in quantiles.items()},
+            }
+        return stats
+
+    def prometheus_text(self):
+        lines = [
+            f"# HELP {METRIC_NAME} Latency of each search stage",
+            f"# TYPE {METRIC_NAME} summary",
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            for q, value in histogram.quantiles().items():
+                lines.append(f'{METRIC_NAME}{{stage="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{name}"}} {histogram.total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+
+tracer = Tracer(enabled=os.environ.get("JOB_PORTAL_TRACING", "").lower() in ("1", "true", "yes"))
+
+
+# Start collecting the spans of this request (in this thread/task); returns the Trace
+def start_trace(name):
+    trace = Trace(name)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+# Submit fn to a thread pool with the caller's context, so its spans are appended to the
+# caller's trace (worker threads do not inherit context variables)
+def submit_traced(executor, fn, *args, **kwargs):
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# Profile the block with pyinstrument if it is installed, cProfile otherwise. The
+# report text is stored in the current trace (and in the returned dict) on exit.
+@contextmanager
+def profile_block(enabled=True, top=30):
+    result = {}
+    if not enabled:
+        yield result
+        return
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            result["text"] = profiler.output_text(unicode=True, color=False)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+            result["text"] = out.getvalue()
+    trace = current_trace()
+    if trace is not None:
+        trace.profile = result["text"]
@@ -0,0 +1,243 @@
+# vector_store.py
+# Compact on-disk replacement for job_vectors.pkl.
+#
+# A store is a directory with:
+#   vectors.npy    - (n_jobs, dim) matrix of L2-normalized embeddings, float32 or float16
+#   ids.json       - job ids in row order (the id -> row index is built from it on load)
+#   metadata.json  - job dicts in row order
+#   hashes.json    - optional content hash per row, used for incremental re-embedding
+#   manifest.json  - format version, shape, dtype and a digest of the ids and vectors
+#   compression.npz - only in compressed stores (see compression.py)
+#
+# vectors.npy is opened with mmap_mode="r", so loading does not read the matrix into memory.
+#
+# One-shot conversion from the old pickle:
+#   python vector_store.py job_vectors.pkl job_vectors_store [--float16]
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import warnings
+
+import numpy as np
+
+from search_engine import EMBEDDING_DIM, JobSearchEngine, normalize_rows
+
+STORE_FORMAT_VERSION = 1
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.json"
+METADATA_FILE = "metadata.json"
+HASHES_FILE = "hashes.json"
+MANIFEST_FILE = "manifest.json"
+# SHA-256 of the pickle a store was converted from, so a new pickle triggers a reconversion
+SOURCE_FILE = "source.json"
+DIGEST_CHUNK_BYTES = 1 << 24
+
+
+# job_store.Job objects are written as plain dicts
+def _to_json(obj):
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(path, obj):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, default=_to_json)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def store_exists(store_dir):
+    return os.path.exists(os.path.join(store_dir, MANIFEST_FILE))
+
+
+# Writes a store block by block, so the full matrix never has to be in memory.
+# Blocks must already be L2-normalized. An existing store in store_dir is invalidated
+# (its manifest removed) as soon as the writer opens it, and the manifest is only
+# written back by close, after every other file: a run that dies in between leaves no
+# store rather than new vectors with the old ids, metadata or side files.
+class VectorStoreWriter:
+    def __init__(self, store_dir, count, dim, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        # int8 is only written by compression.py, together with its scales
+        if self.dtype not in (np.float16, np.float32, np.int8):
+            raise ValueError(f"Unsupported vector dtype: {self.dtype}")
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        self.vectors_path = os.path.join(store_dir, VECTORS_FILE)
+        self.tmp_path = self.vectors_path + ".tmp"
+        self.vectors = np.lib.format.open_memmap(self.tmp_path, mode="w+", dtype=self.dtype, shape=(count, dim))
+
+    def write(self, start, block):
+        self.vectors[start:start + len(block)] = block
+
+    def close(self, job_ids, jobs, hashes=None):
+        count, dim = self.vectors.shape
+        if not (len(job_ids) == len(jobs) == count):
+            raise ValueError("job_ids, jobs and matrix must have the same number of rows")
+        self.vectors.flush()
+        self.vectors = None
+        digest = _store_digest(self.tmp_path, job_ids)
+        os.replace(self.tmp_path, self.vectors_path)
+        _write_json(os.path.join(self.store_dir, IDS_FILE), list(job_ids))
+        _write_json(os.path.join(self.store_dir, METADATA_FILE), list(jobs))
+        hashes_path = os.path.join(self.store_dir, HASHES_FILE)
+        if hashes is not None:
+            _write_json(hashes_path, list(hashes))
+        elif os.path.exists(hashes_path):
+            os.remove(hashes_path)
+        # The manifest goes last so a half-written store is never picked up by store_exists
+        # (files written into store_dir between __init__ and close, like compression.npz,
+        # are covered too)
+        _write_json(os.path.join(self.store_dir, MANIFEST_FILE), {
+            "version": STORE_FORMAT_VERSION,
+            "count": int(count),
+            "dim": int(dim),
+            "dtype": self.dtype.name,
+            "digest": digest,
+        })
+
+
+# Write a store; matrix rows must be in the same order as job_ids and jobs
+def save_vector_store(store_dir, job_ids, matrix, jobs, dtype=np.float32, normalized=False):
+    if not (len(job_ids) == len(jobs) == matrix.shape[0]):
+        raise ValueError("job_ids, jobs and matrix must have the same number of rows")
+    if not normalized:
+        matrix = normalize_rows(np.array(matrix, dtype=np.float32))
+    writer = VectorStoreWriter(store_dir, matrix.shape[0], matrix.shape[1], dtype=dtype)
+    writer.write(0, matrix)
+    writer.close(job_ids, jobs)
+
+
+# SHA-1 of the ids and the raw vectors file; changes whenever any row is re-embedded
+def _store_digest(vectors_path, job_ids):
+    digest = hashlib.sha1()
+    for job_id in job_ids:
+        digest.update(str(job_id).encode("utf-8"))
+        digest.update(b"\0")
+    with open(vectors_path, "rb") as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Digest of the store's ids and vectors, recorded in the manifest when the store is
+# written. Derived indexes (compressed copy, IVF) keep it to detect a rebuilt store.
+# Stores written before the digest was recorded get it computed here.
+def store_digest(store_dir):
+    digest = _read_json(os.path.join(store_dir, MANIFEST_FILE)).get("digest")
+    if digest is None:
+        digest = _store_digest(os.path.join(store_dir, VECTORS_FILE), _read_json(os.path.join(store_dir, IDS_FILE)))
+    return digest
+
+
+def load_vectors(store_dir):
+    manifest = _read_json(os.path.join(store_dir, MANIFEST_FILE))
+    if manifest.get("version") != STORE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported vector store version: {manifest.get('version')}")
+    matrix = np.load(os.path.join(store_dir, VECTORS_FILE), mmap_mode="r")
+    if matrix.shape != (manifest["count"], manifest["dim"]):
+        raise ValueError(f"vectors.npy has shape {matrix.shape}, manifest says "
+                         f"({manifest['count']}, {manifest['dim']})")
+    job_ids = _read_json(os.path.join(store_dir, IDS_FILE))
+    return job_ids, matrix
+
+
+# Content hashes in row order, or None if the store was written without them
+def load_hashes(store_dir):
+    path = os.path.join(store_dir, HASHES_FILE)
+    if not os.path.exists(path):
+        return None
+    return _read_json(path)
+
+
+# Load a store as a JobSearchEngine backed by the memory-mapped matrix (no copy).
+# With a job_store (see job_store.py) the engine reuses its Job objects instead of
+# keeping a second copy of the metadata; metadata.json is only read for ids it lacks.
+def load_vector_store(store_dir, job_store=None):
+    job_ids, matrix = load_vectors(store_dir)
+    if job_store is None:
+        jobs = _read_json(os.path.join(store_dir, METADATA_FILE))
+    else:
+        jobs = [job_store.get(job_id) for job_id in job_ids]
+        missing = [row for row, job in enumerate(jobs) if job is None]
+        if missing:
+            from job_store import normalize_job
+
+            metadata = _read_json(os.path.join(store_dir, METADATA_FILE))
+            for row in missing:
+                jobs[row] = normalize_job(metadata[row])
+            del metadata
+    engine = JobSearchEngine(job_ids, matrix, jobs, normalized=True)
+    # Compressed stores (see compression.py) project every query the same way as their rows
+    from compression import load_compression
+
+    engine.compression = load_compression(store_dir)
+    return engine
+
+
+# Load the store the app searches: the compressed copy (see compression.py) when it
+# matches store_dir, with its saved IVF index and its BM25 index attached
+def open_search_engine(store_dir, job_store=None, compressed_dir=None):
+    from ann_index import attach_saved_index
+    from bm25_index import attach_bm25
+    from compression import is_compressed_copy
+
+    if compressed_dir and store_exists(compressed_dir):
+        if is_compressed_copy(compressed_dir, store_dir):
+            store_dir = compressed_dir
+        else:
+            warnings.warn(f"{compressed_dir} was built from other vectors than {store_dir}; searching the full "
+                          f"store. Rebuild it with compression.py.", RuntimeWarning, stacklevel=2)
+    engine = load_vector_store(store_dir, job_store=job_store)
+    attach_saved_index(engine, store_dir)
+    # BM25 keyword scores for hybrid ranking, built on first start if missing
+    attach_bm25(engine, store_dir, jobs_source=job_store.source if job_store is not None else "")
+    return engine
+
+
+def convert_pickle(pkl_path, store_dir, dtype=np.float32, dim=EMBEDDING_DIM, source_sha256=None):
+    with open(pkl_path, "rb") as f:
+        job_vectors = pickle.load(f)
+    engine = JobSearchEngine.from_job_vectors(job_vectors, dim=dim)
+    del job_vectors
+    save_vector_store(store_dir, engine.job_ids, engine.matrix, engine.jobs, dtype=dtype, normalized=True)
+    if source_sha256:
+        _write_json(os.path.join(store_dir, SOURCE_FILE), {"sha256": source_sha256})
+    return engine
+
+
+# SHA-256 of the pickle the store was converted from; None for stores built another way
+def converted_from(store_dir):
+    path = os.path.join(store_dir, SOURCE_FILE)
+    if not os.path.exists(path):
+        return None
+    return _read_json(path).get("sha256")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert job_vectors.pkl into a memory-mapped vector store")
+    parser.add_argument("pkl_path", nargs="?", default="job_vectors.pkl")
+    parser.add_argument("store_dir", nargs="?", default="job_vectors_store")
+    parser.add_argument("--float16", action="store_true", help="store vectors as float16 (half the size)")
+    args = parser.parse_args()
+
+    dtype = np.float16 if args.float16 else np.float32
+    engine = convert_pickle(args.pkl_path, args.store_dir, dtype=dtype)
+    print(f"Converted {len(engine)} jobs into {args.store_dir} ({np.dtype(dtype).name})")
+    if engine.skipped_ids:
+        print(f"Skipped {len(engine.skipped_ids)} jobs with incorrect embeddings")
+
+
+if __name__ == "__main__":
+    main()